@@ -2,29 +2,57 @@
 """
 Complete Supabase cleanup and reupload script.
 1. Clear all tables
-2. Clear storage
+2. Clear storage (skipped with --keep-storage)
 3. Upload all 4 weeks data
 4. Generate missing W2 data
 5. Upload meta_adsets
 6. Verify
 """
 
+import argparse
+import asyncio
+import atexit
+import io
 import json
 import os
 import sys
+import threading
 import hashlib
+import importlib.util
 import httpx
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # Optional: falls back to stdlib json
+    orjson = None
+
+try:
+    import asyncpg
+except ImportError:  # Optional: direct Postgres bulk inserts
+    asyncpg = None
+
+try:
+    from PIL import Image
+except ImportError:  # Optional: large images are uploaded as-is
+    Image = None
+
 try:
     from supabase import create_client, Client
+    from supabase.client import ClientOptions
+    from postgrest.types import ReturnMethod
 except ImportError:
     print("Error: supabase-py not installed. Run: pip install supabase", file=sys.stderr)
     sys.exit(1)
 
+# Allow `python scripts/<name>.py` as well as `python -m scripts.<name>`
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.upload_common import ThreadLocalStdout, archive_report_json, dashboard_raw_data
+
 # Load environment
 env_path = Path(__file__).parent.parent / '.env.local'
 if env_path.exists():
@@ -32,12 +60,42 @@ if env_path.exists():
 
 SUPABASE_URL = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+# Optional Postgres connection string; enables direct bulk inserts that bypass PostgREST
+SUPABASE_DB_URL = os.getenv('SUPABASE_DB_URL')
 
 if not SUPABASE_URL or not SUPABASE_KEY:
     print("Error: Missing Supabase credentials", file=sys.stderr)
     sys.exit(1)
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Pool shared by every PostgREST/storage call; sized for the concurrent week workers
+_POOL_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+# HTTP/2 multiplexing needs the optional h2 package
+_HTTP2 = importlib.util.find_spec('h2') is not None
+
+
+def _tune_http_client(owner: Any, attr: str, timeout: float):
+    """Swap a supabase sub-client's httpx.Client for one with a larger keep-alive pool."""
+    old = getattr(owner, attr, None)
+    if not isinstance(old, httpx.Client):
+        return
+    setattr(owner, attr, httpx.Client(
+        base_url=old.base_url,
+        headers=old.headers,
+        timeout=timeout,
+        follow_redirects=old.follow_redirects,
+        limits=_POOL_LIMITS,
+        http2=_HTTP2,
+    ))
+    old.close()
+
+
+supabase: Client = create_client(
+    SUPABASE_URL,
+    SUPABASE_KEY,
+    options=ClientOptions(postgrest_client_timeout=60, storage_client_timeout=120),
+)
+_tune_http_client(supabase.postgrest, 'session', 60)
+_tune_http_client(supabase.storage, '_client', 120)
 SCRIPTS_DIR = Path(__file__).parent
 
 # Week definitions
@@ -48,6 +106,15 @@ WEEKS = [
     {"date": "2026-02-05", "start": "2026-02-05", "end": "2026-02-11"},
 ]
 
+# Max in-flight image downloads
+DOWNLOAD_CONCURRENCY = 16
+# Max in-flight storage uploads
+UPLOAD_CONCURRENCY = 8
+# Worker threads for storage list/remove calls
+STORAGE_WORKERS = 16
+# Weeks uploaded at the same time
+WEEK_CONCURRENCY = 4
+
 # Tables to clear
 TABLES = [
     'reports', 'ad_creatives', 'ad_copies', 'weekly_insights',
@@ -60,67 +127,221 @@ def load_json(filename: str) -> Optional[Dict]:
     """Load JSON file if exists."""
     filepath = SCRIPTS_DIR / filename
     if filepath.exists():
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        return orjson.loads(raw) if orjson else json.loads(raw)
     return None
 
 
+# Background worker for JSON serialization/writes so they overlap with network calls
+_BACKGROUND = ThreadPoolExecutor(max_workers=2)
+_PENDING_SAVES: List[Future] = []
+
+
 def save_json(filename: str, data: Any):
-    """Save JSON file."""
-    filepath = SCRIPTS_DIR / filename
+    """Save JSON file in the background; call wait_for_saves() before exiting."""
+    _PENDING_SAVES.append(_BACKGROUND.submit(_write_json, SCRIPTS_DIR / filename, data))
+
+
+def wait_for_saves():
+    """Block until every queued save_json write has finished."""
+    while _PENDING_SAVES:
+        try:
+            _PENDING_SAVES.pop(0).result()
+        except Exception as e:
+            print(f"  ⚠️  Failed to save JSON: {e}")
+
+
+def _write_json(filepath: Path, data: Any):
+    if orjson:
+        # orjson emits UTF-8 directly, matching ensure_ascii=False
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
     with open(filepath, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
+# Rows per PostgREST insert request
+INSERT_BATCH_SIZE = 500
+
+
+class _PgWriter:
+    """Bulk inserts straight into Postgres with asyncpg.
+    
+    The pool lives on a private event loop thread so any caller thread can use it.
+    """
+    
+    def __init__(self, dsn: str):
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        self._pool = self._run(asyncpg.create_pool(dsn, min_size=1, max_size=8))
+    
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+    
+    def insert(self, table: str, records: List[Dict]):
+        # One statement per batch; Postgres casts the JSON to the table's column types
+        cols = ', '.join(f'"{c}"' for c in records[0])
+        sql = (
+            f'INSERT INTO "{table}" ({cols}) '
+            f'SELECT {cols} FROM jsonb_populate_recordset(NULL::"{table}", $1::jsonb)'
+        )
+        payload = orjson.dumps(records).decode() if orjson else json.dumps(records, ensure_ascii=False)
+        self._run(self._pool.execute(sql, payload))
+
+
+_PG_WRITER: Optional[_PgWriter] = None
+_PG_LOCK = threading.Lock()
+
+
+def get_pg_writer() -> Optional[_PgWriter]:
+    """Lazily connect the direct Postgres writer; None when not configured or unreachable."""
+    global _PG_WRITER, SUPABASE_DB_URL
+    if not (asyncpg and SUPABASE_DB_URL):
+        return None
+    with _PG_LOCK:
+        if _PG_WRITER is None and SUPABASE_DB_URL:
+            try:
+                _PG_WRITER = _PgWriter(SUPABASE_DB_URL)
+            except Exception as e:
+                print(f"    ⚠️  Direct Postgres connection failed, using PostgREST: {e}")
+                SUPABASE_DB_URL = None
+        return _PG_WRITER
+
+
+def insert_records(table: str, records: List[Dict], label: str, key: str) -> int:
+    """Insert records in batches; fall back to per-row inserts if a batch fails."""
+    count = 0
+    pg = get_pg_writer()
+    for i in range(0, len(records), INSERT_BATCH_SIZE):
+        batch = records[i:i+INSERT_BATCH_SIZE]
+        if pg:
+            try:
+                pg.insert(table, batch)
+                count += len(batch)
+                continue
+            except Exception as e:
+                print(f"    ⚠️  Direct insert into {table} failed, using PostgREST: {e}")
+        try:
+            supabase.table(table).insert(batch, returning=ReturnMethod.minimal).execute()
+            count += len(batch)
+            continue
+        except Exception as e:
+            print(f"    ⚠️  Batch insert into {table} failed, retrying per row: {e}")
+        
+        for record in batch:
+            try:
+                supabase.table(table).insert(record, returning=ReturnMethod.minimal).execute()
+                count += 1
+            except Exception as e:
+                print(f"    ⚠️  Failed to insert {label} {record.get(key)}: {e}")
+    return count
+
+
 # ============================================================
 # STEP 1: Clear all tables
 # ============================================================
+def _clear_table(table: str) -> Optional[Exception]:
+    """Delete every row in table; returns the error instead of printing it."""
+    try:
+        # Use a condition that matches all rows
+        supabase.table(table).delete(returning=ReturnMethod.minimal).neq(
+            'id', '00000000-0000-0000-0000-000000000000'
+        ).execute()
+    except Exception as e:
+        return e
+    return None
+
+
 def clear_all_tables():
     print("\n" + "=" * 60)
     print("🗑️  STEP 1: Clearing all tables")
     print("=" * 60)
     
-    for table in TABLES:
-        try:
-            # Use a condition that matches all rows
-            result = supabase.table(table).delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
+    # One TRUNCATE for every table (see migrations/20261016_truncate_report_tables.sql)
+    try:
+        supabase.rpc('truncate_report_tables').execute()
+        print(f"  ✅ Truncated {len(TABLES)} tables")
+        return
+    except Exception as e:
+        print(f"  ⚠️  truncate_report_tables RPC unavailable, deleting per table: {e}")
+    
+    # Tables are independent deletes, so issue them concurrently
+    with ThreadPoolExecutor(max_workers=len(TABLES)) as ex:
+        errors = list(ex.map(_clear_table, TABLES))
+    
+    # Report after the join so output stays in TABLES order
+    for table, error in zip(TABLES, errors):
+        if error:
+            print(f"  ⚠️  Error clearing {table}: {error}")
+        else:
             print(f"  ✅ Cleared {table}")
-        except Exception as e:
-            print(f"  ⚠️  Error clearing {table}: {e}")
 
 
 # ============================================================
 # STEP 2: Clear storage
 # ============================================================
+# Rows per list_ad_images call; must not exceed PostgREST's db-max-rows (1000 on Supabase)
+LIST_PAGE_SIZE = 1000
+
+
+def list_storage_files() -> List[str]:
+    """List every file path in the ad-images bucket."""
+    # Paged reads of storage.objects (see migrations/20261016_list_ad_images.sql)
+    try:
+        all_files = []
+        while True:
+            rows = supabase.rpc('list_ad_images', {
+                'p_limit': LIST_PAGE_SIZE,
+                'p_offset': len(all_files),
+            }).execute().data or []
+            all_files.extend(r if isinstance(r, str) else r['list_ad_images'] for r in rows)
+            if len(rows) < LIST_PAGE_SIZE:
+                return all_files
+    except Exception as e:
+        print(f"  ⚠️  list_ad_images RPC unavailable, listing per folder: {e}")
+    
+    bucket = supabase.storage.from_('ad-images')
+    items = bucket.list()
+    
+    # Handle both flat files and folders
+    all_files = [item['name'] for item in items if item.get('id') is not None]
+    folder_names = [item.get('name', '') for item in items if item.get('id') is None]
+    
+    # Folder listings are independent, so fetch them in parallel
+    with ThreadPoolExecutor(STORAGE_WORKERS) as ex:
+        listings = list(ex.map(bucket.list, folder_names))
+    
+    for name, folder_files in zip(folder_names, listings):
+        all_files.extend(f"{name}/{f['name']}" for f in folder_files if f.get('id'))
+    return all_files
+
+
+def list_week_files(folder: str) -> set:
+    """Names of files already stored under one week folder (empty on error)."""
+    try:
+        files = supabase.storage.from_('ad-images').list(folder, {'limit': 1000})
+    except Exception as e:
+        print(f"    ⚠️  Failed to list {folder}/: {e}")
+        return set()
+    return {f['name'] for f in files if f.get('id')}
+
+
 def clear_storage():
     print("\n" + "=" * 60)
     print("🗑️  STEP 2: Clearing storage (ad-images bucket)")
     print("=" * 60)
     
     try:
-        # List all files in ad-images bucket
-        files = supabase.storage.from_('ad-images').list()
-        
-        # Handle both flat files and folders
-        all_files = []
-        
-        for item in files:
-            name = item.get('name', '')
-            if item.get('id') is None:  # It's a folder
-                # List files in folder
-                folder_files = supabase.storage.from_('ad-images').list(name)
-                for f in folder_files:
-                    if f.get('id'):  # It's a file
-                        all_files.append(f"{name}/{f['name']}")
-            else:  # It's a file
-                all_files.append(name)
+        all_files = list_storage_files()
         
         if all_files:
             # Delete in batches
             batch_size = 100
-            for i in range(0, len(all_files), batch_size):
-                batch = all_files[i:i+batch_size]
-                supabase.storage.from_('ad-images').remove(batch)
+            batches = [all_files[i:i+batch_size] for i in range(0, len(all_files), batch_size)]
+            with ThreadPoolExecutor(STORAGE_WORKERS) as ex:
+                list(ex.map(supabase.storage.from_('ad-images').remove, batches))
             print(f"  ✅ Deleted {len(all_files)} files from ad-images bucket")
         else:
             print("  ✅ ad-images bucket is already empty")
@@ -132,34 +353,102 @@ def clear_storage():
 # ============================================================
 # STEP 3 & 4: Upload data helpers
 # ============================================================
+# Cheap HEAD probe before the full GET so dead URLs fail fast
+HEAD_TIMEOUT = 5
+GET_TIMEOUT = 20
+MAX_IMAGE_BYTES = 20_000_000
+
+
+def head_ok(resp: httpx.Response) -> bool:
+    """False when a HEAD response shows the image is gone or too large to bother with."""
+    if resp.status_code in (404, 410):
+        return False
+    # Some CDNs reject HEAD or omit Content-Length; let the GET decide then
+    size = resp.headers.get('content-length')
+    return not (size and size.isdigit() and int(size) > MAX_IMAGE_BYTES)
+
+
+# Shared keep-alive client so sequential downloads reuse TLS connections
+_HTTP = httpx.Client(
+    timeout=30,
+    follow_redirects=True,
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+)
+atexit.register(_HTTP.close)
+
+
 def download_image(url: str) -> Optional[bytes]:
     """Download image from URL."""
     if not url:
         return None
     try:
-        with httpx.Client(timeout=30) as client:
-            resp = client.get(url, follow_redirects=True)
-            if resp.status_code == 200:
-                return resp.content
+        if not head_ok(_HTTP.head(url, timeout=HEAD_TIMEOUT)):
+            return None
+        resp = _HTTP.get(url, timeout=GET_TIMEOUT)
+        if resp.status_code == 200:
+            return resp.content
     except Exception as e:
         print(f"    ⚠️  Failed to download image: {e}")
     return None
 
 
-def upload_image_to_storage(image_data: bytes, filename: str) -> Optional[str]:
+_READY_BUCKETS = set()
+
+
+def ensure_bucket(name: str = 'ad-images', public: bool = True):
+    """Create a storage bucket if missing; each bucket is only checked once per run."""
+    if name in _READY_BUCKETS:
+        return
+    try:
+        supabase.storage.get_bucket(name)
+    except Exception:
+        supabase.storage.create_bucket(name, {'public': public})
+    _READY_BUCKETS.add(name)
+
+
+# Images above this size are re-encoded before upload
+SHRINK_THRESHOLD_BYTES = 300_000
+SHRINK_MAX_SIDE = 1600
+
+
+def sniff_content_type(data: bytes) -> str:
+    """Guess an image MIME type from its magic bytes (defaults to JPEG)."""
+    if data.startswith(b'\x89PNG'):
+        return 'image/png'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    return 'image/jpeg'
+
+
+def maybe_shrink(data: bytes) -> Tuple[bytes, str]:
+    """Re-encode large images as a capped-size JPEG; small ones pass through untouched."""
+    content_type = sniff_content_type(data)
+    if Image is None or len(data) < SHRINK_THRESHOLD_BYTES or content_type == 'image/gif':
+        return data, content_type
+    try:
+        img = Image.open(io.BytesIO(data)).convert('RGB')
+        img.thumbnail((SHRINK_MAX_SIDE, SHRINK_MAX_SIDE))
+        buf = io.BytesIO()
+        img.save(buf, 'JPEG', quality=85, optimize=True, progressive=True)
+    except Exception as e:
+        print(f"    ⚠️  Failed to re-encode image, uploading original: {e}")
+        return data, content_type
+    shrunk = buf.getvalue()
+    # Keep the original if re-encoding did not actually help
+    return (shrunk, 'image/jpeg') if len(shrunk) < len(data) else (data, content_type)
+
+
+def upload_image_to_storage(image_data: bytes, filename: str,
+                            content_type: str = 'image/jpeg') -> Optional[str]:
     """Upload image to Supabase Storage."""
     try:
-        # Ensure bucket exists
-        try:
-            supabase.storage.get_bucket('ad-images')
-        except:
-            supabase.storage.create_bucket('ad-images', {'public': True})
-        
-        # Upload
+        # Upload (bucket is created once by ensure_bucket())
         supabase.storage.from_('ad-images').upload(
             filename,
             image_data,
-            {'content-type': 'image/jpeg', 'upsert': 'true'}
+            {'content-type': content_type, 'upsert': 'true'}
         )
         
         # Get public URL
@@ -173,6 +462,79 @@ def upload_image_to_storage(image_data: bytes, filename: str) -> Optional[str]:
         return None
 
 
+# Per-run dedupe caches: source image URL -> public URL, content digest -> public URL
+_URL_CACHE: Dict[str, str] = {}
+_CONTENT_CACHE: Dict[str, str] = {}
+# Set by --keep-storage: the bucket was not wiped, so week folders may already hold images
+_KEEP_STORAGE = False
+
+
+def _store_image(image_data: bytes, filename: str) -> Optional[str]:
+    """Upload image bytes unless identical content was already stored this run."""
+    digest = hashlib.blake2b(image_data, digest_size=8).hexdigest()
+    if digest in _CONTENT_CACHE:
+        return _CONTENT_CACHE[digest]
+    body, content_type = maybe_shrink(image_data)
+    public_url = upload_image_to_storage(body, filename, content_type)
+    if public_url:
+        _CONTENT_CACHE[digest] = public_url
+    return public_url
+
+
+async def _transfer_all(jobs: List[Tuple[str, str]]) -> List[Optional[str]]:
+    """Download each (image_url, storage_filename) job and upload it to storage.
+    
+    Downloads and uploads overlap; the result order matches jobs.
+    """
+    download_sem = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+    upload_sem = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+    limits = httpx.Limits(max_connections=DOWNLOAD_CONCURRENCY * 2)
+    
+    async with httpx.AsyncClient(timeout=30, limits=limits, follow_redirects=True) as client:
+        async def fetch(url: str) -> Optional[bytes]:
+            async with download_sem:
+                try:
+                    if not head_ok(await client.head(url, timeout=HEAD_TIMEOUT)):
+                        return None
+                    resp = await client.get(url, timeout=GET_TIMEOUT)
+                    if resp.status_code == 200:
+                        return resp.content
+                except Exception as e:
+                    print(f"    ⚠️  Failed to download image: {e}")
+                return None
+        
+        async def process(url: str, filename: str) -> Optional[str]:
+            image_data = await fetch(url)
+            if not image_data:
+                return None
+            # supabase-py storage is synchronous, so run it on a worker thread
+            async with upload_sem:
+                return await asyncio.to_thread(_store_image, image_data, filename)
+        
+        return await asyncio.gather(*(process(u, f) for u, f in jobs))
+
+
+def transfer_images(jobs: List[Tuple[str, str]]) -> List[Optional[str]]:
+    """Copy images into storage concurrently, falling back to sequential transfer."""
+    if not jobs:
+        return []
+    try:
+        return asyncio.run(_transfer_all(jobs))
+    except Exception as e:
+        print(f"    ⚠️  Concurrent transfer failed, falling back to sequential: {e}")
+    
+    results = []
+    for url, filename in jobs:
+        image_data = download_image(url)
+        results.append(_store_image(image_data, filename) if image_data else None)
+    return results
+
+
+def archive_path(week: Dict) -> str:
+    """Object path of a week's raw report JSON in the reports bucket."""
+    return f"{week['date']}.json"
+
+
 def upload_report_data(week: Dict) -> Optional[str]:
     """Upload report_data and return report_id."""
     filename = f"report_data_{week['date']}.json"
@@ -181,6 +543,9 @@ def upload_report_data(week: Dict) -> Optional[str]:
         print(f"  ⚠️  {filename} not found, skipping")
         return None
     
+    # Serialize + upload the raw JSON while the table inserts below are in flight
+    archive = _BACKGROUND.submit(archive_report_json, supabase, archive_path(week), data)
+    
     meta_total = data.get('meta', {}).get('total', {})
     ga4_data = data.get('ga4', {})
     cyberbiz_data = data.get('cyberbiz', {})
@@ -209,9 +574,12 @@ def upload_report_data(week: Dict) -> Optional[str]:
         'cyber_aov': cyberbiz_data.get('aov', 0),
         'cyber_new_members': cyberbiz_data.get('new_members', 0),
         'mer': data.get('mer', 0),
-        'raw_data': data
+        # Full JSON lives in storage; the row keeps only what the dashboard reads
+        'raw_data': dashboard_raw_data(data),
+        'raw_data_path': archive_path(week),
     }
     
+    # Only the reports insert needs rows back (for report_id); the rest use return=minimal
     result = supabase.table('reports').insert(report_record).execute()
     report_id = result.data[0]['id'] if result.data else None
     print(f"  ✅ reports: inserted (id: {report_id[:8] if report_id else 'N/A'}...)")
@@ -232,8 +600,8 @@ def upload_report_data(week: Dict) -> Optional[str]:
             'cpa': c.get('cpa'),
             'atc': c.get('atc'),
         } for c in campaigns]
-        supabase.table('meta_campaigns').insert(campaign_records).execute()
-        print(f"  ✅ meta_campaigns: {len(campaign_records)} records")
+        inserted = insert_records('meta_campaigns', campaign_records, 'campaign', 'campaign_id')
+        print(f"  ✅ meta_campaigns: {inserted} records")
     
     # Upload audience age
     age_data = data.get('meta_audience', {}).get('age', [])
@@ -246,8 +614,8 @@ def upload_report_data(week: Dict) -> Optional[str]:
             'clicks': a.get('clicks'),
             'purchases': a.get('purchases')
         } for a in age_data]
-        supabase.table('meta_audience_age').insert(age_records).execute()
-        print(f"  ✅ meta_audience_age: {len(age_records)} records")
+        inserted = insert_records('meta_audience_age', age_records, 'age range', 'age_range')
+        print(f"  ✅ meta_audience_age: {inserted} records")
     
     # Upload audience gender
     gender_data = data.get('meta_audience', {}).get('gender', [])
@@ -260,8 +628,8 @@ def upload_report_data(week: Dict) -> Optional[str]:
             'clicks': g.get('clicks'),
             'purchases': g.get('purchases')
         } for g in gender_data]
-        supabase.table('meta_audience_gender').insert(gender_records).execute()
-        print(f"  ✅ meta_audience_gender: {len(gender_records)} records")
+        inserted = insert_records('meta_audience_gender', gender_records, 'gender', 'gender')
+        print(f"  ✅ meta_audience_gender: {inserted} records")
     
     # Upload GA4 channels
     ga4_channels = data.get('ga4_channels', [])
@@ -274,8 +642,8 @@ def upload_report_data(week: Dict) -> Optional[str]:
             'purchases': ch.get('purchases'),
             'session_to_atc_rate': ch.get('session_to_atc_rate'),
         } for ch in ga4_channels]
-        supabase.table('ga4_channels').insert(channel_records).execute()
-        print(f"  ✅ ga4_channels: {len(channel_records)} records")
+        inserted = insert_records('ga4_channels', channel_records, 'channel', 'source')
+        print(f"  ✅ ga4_channels: {inserted} records")
     
     # Upload product rankings
     products = data.get('cyberbiz', {}).get('product_ranking', [])
@@ -288,12 +656,23 @@ def upload_report_data(week: Dict) -> Optional[str]:
             'total_revenue': p.get('total_revenue'),
             'rank': idx + 1
         } for idx, p in enumerate(products)]
-        supabase.table('product_rankings').insert(product_records).execute()
-        print(f"  ✅ product_rankings: {len(product_records)} records")
+        inserted = insert_records('product_rankings', product_records, 'product', 'product_name')
+        print(f"  ✅ product_rankings: {inserted} records")
+    
+    if archive.result() is None and report_id:
+        # Don't leave the row pointing at an object that was never written
+        supabase.table('reports').update({'raw_data_path': None}, returning=ReturnMethod.minimal).eq('id', report_id).execute()
     
     return report_id
 
 
+def roas_tier(roas: float) -> str:
+    """Map ROAS to the ad_creatives performance_tier value."""
+    if roas >= 1.5:
+        return 'high'
+    return 'medium' if roas >= 1 else 'low'
+
+
 def upload_ad_creatives(week: Dict, creatives_data: Optional[List] = None) -> int:
     """Upload ad_creatives data."""
     if creatives_data is None:
@@ -304,55 +683,72 @@ def upload_ad_creatives(week: Dict, creatives_data: Optional[List] = None) -> in
         print(f"  ⚠️  ad_creatives_{week['date']}.json not found, skipping")
         return 0
     
-    count = 0
-    images_uploaded = 0
+    records = []
     
+    # Resolve storage paths first so every image can be transferred concurrently.
+    # URLs already stored earlier in this run (same ad across weeks) are skipped.
+    prepared = []
+    jobs = {}
+    report_date, week_start, week_end = week['date'], week['start'], week['end']
+    # After a storage wipe the folder is empty by definition; only list it when storage was kept
+    existing = list_week_files(report_date) if _KEEP_STORAGE else set()
     for creative in creatives_data:
-        ad_id = creative.get('ad_id') or creative.get('creative_id')
+        g = creative.get
+        ad_id = g('ad_id') or g('creative_id')
         
-        image_url = creative.get('image_url')
-        if not image_url and creative.get('carousel_images'):
-            image_url = creative['carousel_images'][0]
+        image_url = g('image_url')
+        if not image_url:
+            carousel = g('carousel_images')
+            if carousel:
+                image_url = carousel[0]
         
-        storage_url = None
-        if image_url:
+        if image_url and image_url not in _URL_CACHE and image_url not in jobs:
             image_hash = hashlib.md5(image_url.encode()).hexdigest()[:12]
-            storage_filename = f"{week['date']}/{ad_id}_{image_hash}.jpg"
-            
-            image_data = download_image(image_url)
-            if image_data:
-                storage_url = upload_image_to_storage(image_data, storage_filename)
-                if storage_url:
-                    images_uploaded += 1
+            storage_name = f"{ad_id}_{image_hash}.jpg"
+            storage_filename = f"{report_date}/{storage_name}"
+            if storage_name in existing:
+                # Same URL hash means same content; reuse the stored copy from a previous run
+                _URL_CACHE[image_url] = supabase.storage.from_('ad-images').get_public_url(storage_filename)
+            else:
+                jobs[image_url] = storage_filename
+        prepared.append((creative, ad_id, image_url))
+    
+    images_uploaded = 0
+    for image_url, storage_url in zip(jobs, transfer_images(list(jobs.items()))):
+        if storage_url:
+            _URL_CACHE[image_url] = storage_url
+            images_uploaded += 1
+    
+    for creative, ad_id, image_url in prepared:
+        g = creative.get
+        storage_url = _URL_CACHE.get(image_url) if image_url else None
+        ad_name = g('ad_name')
+        roas = g('roas', 0)
         
         record = {
-            'report_date': week['date'],
-            'week_start': week['start'],
-            'week_end': week['end'],
-            'creative_name': creative.get('ad_name'),
+            'report_date': report_date,
+            'week_start': week_start,
+            'week_end': week_end,
+            'creative_name': ad_name,
             'ad_id': ad_id,
-            'campaign_name': creative.get('ad_name'),
+            'campaign_name': ad_name,
             'image_url': storage_url or image_url,
             'thumbnail_url': image_url,
             'metrics': {
-                'spend': creative.get('spend', 0),
-                'impressions': creative.get('impressions', 0),
-                'clicks': creative.get('clicks', 0),
-                'purchases': creative.get('purchases', 0),
-                'ctr': creative.get('ctr', 0),
-                'roas': creative.get('roas', 0),
+                'spend': g('spend', 0),
+                'impressions': g('impressions', 0),
+                'clicks': g('clicks', 0),
+                'purchases': g('purchases', 0),
+                'ctr': g('ctr', 0),
+                'roas': roas,
             },
-            'performance_tier': 'high' if creative.get('roas', 0) >= 1.5 else ('medium' if creative.get('roas', 0) >= 1 else 'low'),
-            'vision_analysis': creative.get('ai_analysis'),
+            'performance_tier': roas_tier(roas),
+            'vision_analysis': g('ai_analysis'),
             'tags': [],
         }
-        
-        try:
-            supabase.table('ad_creatives').insert(record).execute()
-            count += 1
-        except Exception as e:
-            print(f"    ⚠️  Failed to insert creative {ad_id}: {e}")
+        records.append(record)
     
+    count = insert_records('ad_creatives', records, 'creative', 'ad_id')
     print(f"  ✅ ad_creatives: {count} records (images: {images_uploaded})")
     return count
 
@@ -367,35 +763,33 @@ def upload_ad_copies(week: Dict, copies_data: Optional[List] = None) -> int:
         print(f"  ⚠️  ad_copies_{week['date']}.json not found, skipping")
         return 0
     
-    count = 0
+    records = []
+    report_date, week_start, week_end = week['date'], week['start'], week['end']
     for copy in copies_data:
-        ad_id = copy.get('ad_id')
-        primary_text = copy.get('primary_text', '')
+        g = copy.get
+        primary_text = g('primary_text', '')
+        purchases = g('purchases', 0)
         
         record = {
-            'report_date': week['date'],
-            'week_start': week['start'],
-            'week_end': week['end'],
-            'ad_id': ad_id,
-            'campaign_name': copy.get('ad_name'),
+            'report_date': report_date,
+            'week_start': week_start,
+            'week_end': week_end,
+            'ad_id': g('ad_id'),
+            'campaign_name': g('ad_name'),
             'copy_type': 'primary_text',
             'copy_content': primary_text,
             'copy_length': len(primary_text),
             'metrics': {
-                'spend': copy.get('spend', 0),
-                'clicks': copy.get('clicks', 0),
-                'purchases': copy.get('purchases', 0),
+                'spend': g('spend', 0),
+                'clicks': g('clicks', 0),
+                'purchases': purchases,
             },
-            'performance_tier': 'high' if copy.get('purchases', 0) > 0 else 'low',
-            'analysis': copy.get('ai_analysis'),
+            'performance_tier': 'high' if purchases > 0 else 'low',
+            'analysis': g('ai_analysis'),
         }
-        
-        try:
-            supabase.table('ad_copies').insert(record).execute()
-            count += 1
-        except Exception as e:
-            print(f"    ⚠️  Failed to insert copy {ad_id}: {e}")
+        records.append(record)
     
+    count = insert_records('ad_copies', records, 'copy', 'ad_id')
     print(f"  ✅ ad_copies: {count} records")
     return count
 
@@ -423,7 +817,7 @@ def upload_weekly_insights(week: Dict, insights_data: Optional[Dict] = None) ->
     }
     
     try:
-        supabase.table('weekly_insights').insert(record).execute()
+        supabase.table('weekly_insights').insert(record, returning=ReturnMethod.minimal).execute()
         print(f"  ✅ weekly_insights: 1 record")
         return 1
     except Exception as e:
@@ -530,7 +924,7 @@ def upload_meta_adsets():
     print("📤 STEP 5: Uploading meta_adsets")
     print("=" * 60)
     
-    total_adsets = 0
+    records = []
     
     for week in WEEKS:
         filename = f"report_data_{week['date']}.json"
@@ -565,15 +959,12 @@ def upload_meta_adsets():
                 'gender_distribution': adset.get('gender_distribution', {}),
                 'interests': adset.get('interests', []),
             }
-            
-            try:
-                supabase.table('meta_adsets').insert(record).execute()
-                total_adsets += 1
-            except Exception as e:
-                print(f"    ⚠️  Failed to insert adset: {e}")
+            records.append(record)
         
-        print(f"  ✅ {week['date']}: {len(adsets)} adsets uploaded")
+        print(f"  ✅ {week['date']}: {len(adsets)} adsets prepared")
     
+    # All weeks go up together; rows are independent so no per-week isolation is needed
+    total_adsets = insert_records('meta_adsets', records, 'adset', 'adset_id')
     print(f"  📊 Total meta_adsets: {total_adsets}")
     return total_adsets
 
@@ -581,6 +972,14 @@ def upload_meta_adsets():
 # ============================================================
 # STEP 6: Verification
 # ============================================================
+def _count_rows(table: str):
+    """Exact row count via a HEAD request, so no rows are transferred."""
+    try:
+        return supabase.table(table).select('*', count='exact', head=True).execute().count or 0
+    except Exception as e:
+        return e
+
+
 def verify_uploads():
     print("\n" + "=" * 60)
     print("✅ STEP 6: Verification")
@@ -588,26 +987,20 @@ def verify_uploads():
     
     results = {}
     
-    for table in TABLES:
-        try:
-            result = supabase.table(table).select('id', count='exact').execute()
-            count = result.count if hasattr(result, 'count') and result.count else len(result.data)
+    with ThreadPoolExecutor(max_workers=len(TABLES)) as ex:
+        counts = list(ex.map(_count_rows, TABLES))
+    
+    for table, count in zip(TABLES, counts):
+        if isinstance(count, Exception):
+            results[table] = f"Error: {count}"
+            print(f"  {table}: Error - {count}")
+        else:
             results[table] = count
             print(f"  {table}: {count} records")
-        except Exception as e:
-            results[table] = f"Error: {e}"
-            print(f"  {table}: Error - {e}")
     
-    # Count images in storage
+    # Count images in storage (folder listings already run in parallel)
     try:
-        files = supabase.storage.from_('ad-images').list()
-        total_images = 0
-        for item in files:
-            if item.get('id') is None:  # Folder
-                folder_files = supabase.storage.from_('ad-images').list(item['name'])
-                total_images += len([f for f in folder_files if f.get('id')])
-            else:
-                total_images += 1
+        total_images = len(list_storage_files())
         results['ad-images (storage)'] = total_images
         print(f"  ad-images (storage): {total_images} files")
     except Exception as e:
@@ -619,7 +1012,63 @@ def verify_uploads():
 # ============================================================
 # Main execution
 # ============================================================
-def main():
+def process_week(week: Dict):
+    """Upload one week's report, creatives, copies and insights, in dependency order."""
+    print(f"\n📅 Week: {week['date']} ({week['start']} ~ {week['end']})")
+    print("-" * 40)
+    
+    # Check if this is W2 and needs generated data
+    is_w2 = week['date'] == '2026-01-22'
+    
+    # Upload report data
+    upload_report_data(week)
+    
+    # For W2, generate missing data first if needed
+    if is_w2:
+        creatives_file = SCRIPTS_DIR / f"ad_creatives_{week['date']}.json"
+        if not creatives_file.exists():
+            generated = generate_w2_missing_data()
+            if generated:
+                ad_creatives, ad_copies, weekly_insights = generated
+                upload_ad_creatives(week, ad_creatives)
+                upload_ad_copies(week, ad_copies)
+                upload_weekly_insights(week, weekly_insights)
+                return
+    
+    # Upload existing files
+    upload_ad_creatives(week)
+    upload_ad_copies(week)
+    upload_weekly_insights(week)
+
+
+async def _process_all_weeks() -> List[str]:
+    """Run process_week for every week concurrently; returns each week's log in WEEKS order."""
+    stdout = ThreadLocalStdout(sys.stdout)
+    sem = asyncio.Semaphore(WEEK_CONCURRENCY)
+    
+    def run(week: Dict) -> str:
+        stdout.capture()
+        try:
+            process_week(week)
+        except Exception as e:
+            print(f"  ⚠️  Week {week['date']} failed: {e}")
+        return stdout.release()
+    
+    async def run_limited(week: Dict) -> str:
+        async with sem:
+            return await asyncio.to_thread(run, week)
+    
+    sys.stdout = stdout
+    try:
+        return await asyncio.gather(*(run_limited(w) for w in WEEKS))
+    finally:
+        sys.stdout = stdout._target
+
+
+def main(keep_storage: bool = False):
+    global _KEEP_STORAGE
+    _KEEP_STORAGE = keep_storage
+    
     print("=" * 60)
     print("🚀 Supabase Complete Clean & Reupload")
     print("=" * 60)
@@ -629,40 +1078,24 @@ def main():
     # Step 1: Clear all tables
     clear_all_tables()
     
-    # Step 2: Clear storage
-    clear_storage()
+    # Step 2: Clear storage (--keep-storage reuses images already stored instead)
+    if keep_storage:
+        print("\n⏭️  STEP 2: Keeping ad-images storage; existing images will be reused")
+    else:
+        clear_storage()
+    ensure_bucket()
+    ensure_bucket('reports', public=False)
     
     # Step 3 & 4: Upload all weeks data
     print("\n" + "=" * 60)
     print("📤 STEP 3 & 4: Uploading all weeks data")
     print("=" * 60)
     
-    for week in WEEKS:
-        print(f"\n📅 Week: {week['date']} ({week['start']} ~ {week['end']})")
-        print("-" * 40)
-        
-        # Check if this is W2 and needs generated data
-        is_w2 = week['date'] == '2026-01-22'
-        
-        # Upload report data
-        upload_report_data(week)
-        
-        # For W2, generate missing data first if needed
-        if is_w2:
-            creatives_file = SCRIPTS_DIR / f"ad_creatives_{week['date']}.json"
-            if not creatives_file.exists():
-                generated = generate_w2_missing_data()
-                if generated:
-                    ad_creatives, ad_copies, weekly_insights = generated
-                    upload_ad_creatives(week, ad_creatives)
-                    upload_ad_copies(week, ad_copies)
-                    upload_weekly_insights(week, weekly_insights)
-                    continue
-        
-        # Upload existing files
-        upload_ad_creatives(week)
-        upload_ad_copies(week)
-        upload_weekly_insights(week)
+    # Weeks are independent once the tables are cleared, so run them together
+    week_logs = asyncio.run(_process_all_weeks())
+    for log in week_logs:
+        print(log, end='')
+    wait_for_saves()
     
     # Step 5: Upload meta_adsets
     upload_meta_adsets()
@@ -678,4 +1111,7 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Clear Supabase and reupload all weeks')
+    parser.add_argument('--keep-storage', action='store_true',
+                        help='Do not wipe the ad-images bucket; skip images that are already stored')
+    main(keep_storage=parser.parse_args().keep_storage)
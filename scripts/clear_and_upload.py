@@ -3,22 +3,49 @@
 Clear all data and re-upload 4 weeks of data to Supabase.
 """
 
+import asyncio
+import atexit
+import importlib.util
 import json
 import os
+import random
 import sys
 import hashlib
+import io
 import httpx
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, Iterator, List, Optional
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # Optional: falls back to stdlib json
+    orjson = None
+
+try:
+    from PIL import Image
+except ImportError:  # Optional: images are uploaded as downloaded
+    Image = None
+
+try:
+    import ijson
+except ImportError:  # Optional: array files are parsed whole
+    ijson = None
+
 try:
     from supabase import create_client, Client
 except ImportError:
     print("Error: supabase-py not installed. Run: pip install supabase", file=sys.stderr)
     sys.exit(1)
 
+# Allow `python scripts/<name>.py` as well as `python -m scripts.<name>`
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.upload_common import ThreadLocalStdout, archive_report_json, dashboard_raw_data
+
 # Load environment
 env_path = Path(__file__).parent.parent / '.env.local'
 if env_path.exists():
@@ -42,6 +69,43 @@ WEEKS = [
 
 SCRIPTS_DIR = Path(__file__).parent
 
+# Max in-flight image downloads / storage uploads per week
+DOWNLOAD_CONCURRENCY = 16
+UPLOAD_CONCURRENCY = 8
+# Downloaded images waiting for an upload worker
+UPLOAD_QUEUE_SIZE = 32
+
+# Re-encode creative images as WebP before upload (needs Pillow; the dashboard must accept WebP)
+WEBP_IMAGES = os.getenv('AD_IMAGES_WEBP') == '1' and Image is not None
+IMAGE_EXT = '.webp' if WEBP_IMAGES else '.jpg'
+
+# Weeks processed at once; with UPLOAD_CONCURRENCY this caps storage uploads at 32
+WEEK_CONCURRENCY = 4
+
+
+# Storage list page size / paths per remove() call
+STORAGE_PAGE_SIZE = 1000
+STORAGE_REMOVE_BATCH = 1000
+
+
+def list_storage_files(prefix: str = '') -> List[str]:
+    """Every file path under prefix in ad-images, paging and descending into folders only."""
+    bucket = supabase.storage.from_('ad-images')
+    files = []
+    offset = 0
+    while True:
+        items = bucket.list(prefix, {'limit': STORAGE_PAGE_SIZE, 'offset': offset})
+        for item in items:
+            path = f"{prefix}/{item['name']}" if prefix else item['name']
+            # Folders come back without an id; only they need another listing
+            if item.get('id') is None:
+                files.extend(list_storage_files(path))
+            else:
+                files.append(path)
+        if len(items) < STORAGE_PAGE_SIZE:
+            return files
+        offset += STORAGE_PAGE_SIZE
+
 
 def clear_all_data():
     """Clear all tables and storage."""
@@ -63,6 +127,14 @@ def clear_all_data():
         'reports',  # Parent table last
     ]
     
+    # One TRUNCATE for every table (see migrations/20261016_truncate_report_tables.sql)
+    try:
+        supabase.rpc('truncate_report_tables').execute()
+        print(f"  ✅ Truncated {len(tables_to_clear)} tables")
+        tables_to_clear = []
+    except Exception as e:
+        print(f"  ⚠️  truncate_report_tables RPC unavailable, deleting per table: {e}")
+    
     for table in tables_to_clear:
         try:
             # Use a broad filter to delete all rows
@@ -75,27 +147,12 @@ def clear_all_data():
     # Clear storage bucket
     print("\n🗑️  Clearing ad-images storage bucket...")
     try:
-        # List all files in bucket
-        files = supabase.storage.from_('ad-images').list()
-        if files:
-            # List files in subdirectories too
-            all_files = []
-            for item in files:
-                if item.get('name'):
-                    # Check if it's a folder
-                    subfiles = supabase.storage.from_('ad-images').list(item['name'])
-                    if subfiles:
-                        for sf in subfiles:
-                            if sf.get('name'):
-                                all_files.append(f"{item['name']}/{sf['name']}")
-                    else:
-                        all_files.append(item['name'])
-            
-            if all_files:
-                supabase.storage.from_('ad-images').remove(all_files)
-                print(f"  ✅ Deleted {len(all_files)} files from ad-images bucket")
-            else:
-                print("  ✅ ad-images bucket is empty")
+        all_files = list_storage_files()
+        if all_files:
+            bucket = supabase.storage.from_('ad-images')
+            for i in range(0, len(all_files), STORAGE_REMOVE_BATCH):
+                bucket.remove(all_files[i:i+STORAGE_REMOVE_BATCH])
+            print(f"  ✅ Deleted {len(all_files)} files from ad-images bucket")
         else:
             print("  ✅ ad-images bucket is empty")
     except Exception as e:
@@ -108,13 +165,69 @@ def load_json(filename: str) -> Optional[Dict]:
     """Load JSON file if exists."""
     filepath = SCRIPTS_DIR / filename
     if filepath.exists():
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        return orjson.loads(raw) if orjson else json.loads(raw)
     return None
 
 
-def upload_report_data(week: Dict) -> Optional[str]:
-    """Upload report_data and return report_id."""
+def _stream_items(filepath: Path) -> Iterator[Dict]:
+    with open(filepath, 'rb') as f:
+        yield from ijson.items(f, 'item', use_float=True)
+
+
+def load_json_items(filename: str) -> Optional[Iterable[Dict]]:
+    """Items of a top-level JSON array file, streamed when ijson is available."""
+    filepath = SCRIPTS_DIR / filename
+    if not filepath.exists():
+        return None
+    if ijson is None:
+        return load_json(filename)
+    return _stream_items(filepath)
+
+
+# Rows per PostgREST insert request
+INSERT_BATCH_SIZE = 500
+
+# Conflict targets so a rerun updates rows instead of duplicating them
+ON_CONFLICT = {
+    'ad_creatives': 'week_start,ad_id,carousel_index',
+    'ad_copies': 'report_date,ad_id,copy_type',
+    'weekly_insights': 'report_date',
+}
+
+
+def insert_records(table: str, records: List[Dict]) -> int:
+    """Bulk insert (or upsert) records in batches; retries a failed batch per row."""
+    on_conflict = ON_CONFLICT.get(table)
+    
+    def write(payload):
+        query = supabase.table(table)
+        if on_conflict:
+            return query.upsert(payload, on_conflict=on_conflict).execute()
+        return query.insert(payload).execute()
+    
+    count = 0
+    for i in range(0, len(records), INSERT_BATCH_SIZE):
+        batch = records[i:i+INSERT_BATCH_SIZE]
+        try:
+            write(batch)
+            count += len(batch)
+            continue
+        except Exception as e:
+            print(f"    ⚠️  Batch insert into {table} failed, retrying per row: {e}")
+        
+        for record in batch:
+            try:
+                write(record)
+                count += 1
+            except Exception as e:
+                print(f"    ⚠️  Failed to insert {table} row {record.get('ad_id', '')}: {e}")
+    return count
+
+
+def upload_report_data(week: Dict, pending: Dict[str, List[Dict]]) -> Optional[str]:
+    """Upload the reports row and queue its child rows into pending; returns report_id."""
     filename = f"report_data_{week['date']}.json"
     data = load_json(filename)
     if not data:
@@ -149,7 +262,10 @@ def upload_report_data(week: Dict) -> Optional[str]:
         'cyber_aov': cyberbiz_data.get('aov', 0),
         'cyber_new_members': cyberbiz_data.get('new_members', 0),
         'mer': data.get('mer', 0),
-        'raw_data': data
+        # Full JSON lives in Storage (see migrations/20261016_reports_raw_data_path.sql);
+        # the row keeps only what the dashboard reads
+        'raw_data': dashboard_raw_data(data),
+        'raw_data_path': archive_report_json(supabase, f"{week['date']}.json", data),
     }
     
     result = supabase.table('reports').insert(report_record).execute()
@@ -172,8 +288,8 @@ def upload_report_data(week: Dict) -> Optional[str]:
             'cpa': c.get('cpa'),
             'atc': c.get('atc'),
         } for c in campaigns]
-        supabase.table('meta_campaigns').insert(campaign_records).execute()
-        print(f"  ✅ meta_campaigns: {len(campaign_records)} records")
+        pending['meta_campaigns'].extend(campaign_records)
+        print(f"  ✅ meta_campaigns: {len(campaign_records)} records queued")
     
     # Upload audience age
     age_data = data.get('meta_audience', {}).get('age', [])
@@ -186,8 +302,8 @@ def upload_report_data(week: Dict) -> Optional[str]:
             'clicks': a.get('clicks'),
             'purchases': a.get('purchases')
         } for a in age_data]
-        supabase.table('meta_audience_age').insert(age_records).execute()
-        print(f"  ✅ meta_audience_age: {len(age_records)} records")
+        pending['meta_audience_age'].extend(age_records)
+        print(f"  ✅ meta_audience_age: {len(age_records)} records queued")
     
     # Upload audience gender
     gender_data = data.get('meta_audience', {}).get('gender', [])
@@ -200,8 +316,8 @@ def upload_report_data(week: Dict) -> Optional[str]:
             'clicks': g.get('clicks'),
             'purchases': g.get('purchases')
         } for g in gender_data]
-        supabase.table('meta_audience_gender').insert(gender_records).execute()
-        print(f"  ✅ meta_audience_gender: {len(gender_records)} records")
+        pending['meta_audience_gender'].extend(gender_records)
+        print(f"  ✅ meta_audience_gender: {len(gender_records)} records queued")
     
     # Upload GA4 channels
     ga4_channels = data.get('ga4_channels', [])
@@ -214,8 +330,8 @@ def upload_report_data(week: Dict) -> Optional[str]:
             'purchases': ch.get('purchases'),
             'session_to_atc_rate': ch.get('session_to_atc_rate'),
         } for ch in ga4_channels]
-        supabase.table('ga4_channels').insert(channel_records).execute()
-        print(f"  ✅ ga4_channels: {len(channel_records)} records")
+        pending['ga4_channels'].extend(channel_records)
+        print(f"  ✅ ga4_channels: {len(channel_records)} records queued")
     
     # Upload product rankings
     products = data.get('cyberbiz', {}).get('product_ranking', [])
@@ -228,176 +344,406 @@ def upload_report_data(week: Dict) -> Optional[str]:
             'total_revenue': p.get('total_revenue'),
             'rank': idx + 1
         } for idx, p in enumerate(products)]
-        supabase.table('product_rankings').insert(product_records).execute()
-        print(f"  ✅ product_rankings: {len(product_records)} records")
+        pending['product_rankings'].extend(product_records)
+        print(f"  ✅ product_rankings: {len(product_records)} records queued")
     
     return report_id
 
 
+# HTTP/2 multiplexing needs the optional h2 package
+_HTTP2 = importlib.util.find_spec('h2') is not None
+_HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+
+# Shared by every download so connections (and TLS sessions) are reused
+_HTTP = httpx.Client(timeout=30, follow_redirects=True, http2=_HTTP2, limits=_HTTP_LIMITS)
+atexit.register(_HTTP.close)
+
+
 def download_image(url: str) -> Optional[bytes]:
     """Download image from URL."""
     if not url:
         return None
     try:
-        with httpx.Client(timeout=30) as client:
-            resp = client.get(url, follow_redirects=True)
-            if resp.status_code == 200:
-                return resp.content
+        resp = _HTTP.get(url)
+        if resp.status_code == 200:
+            return resp.content
     except Exception as e:
         print(f"    ⚠️  Failed to download: {e}")
     return None
 
 
-def upload_image_to_storage(image_data: bytes, filename: str) -> Optional[str]:
-    """Upload image to Supabase Storage."""
+def download_image_batch(urls: List[str]) -> Dict[str, Optional[bytes]]:
+    """Download many URLs at once over the shared client, without an event loop."""
+    urls = list(dict.fromkeys(urls))
+    with ThreadPoolExecutor(DOWNLOAD_CONCURRENCY) as ex:
+        return dict(zip(urls, ex.map(download_image, urls)))
+
+
+def ensure_bucket(name: str = 'ad-images', public: bool = True):
+    """Create a storage bucket if missing; called once per run, before any upload."""
+    try:
+        supabase.storage.get_bucket(name)
+    except Exception:
+        supabase.storage.create_bucket(name, {'public': public})
+
+
+def public_url(filename: str) -> str:
+    """Public URL of an ad-images object; the bucket is public, so no API call is needed."""
+    return f"{SUPABASE_URL}/storage/v1/object/public/ad-images/{filename}"
+
+
+def encode_image(image_data: bytes) -> tuple[bytes, str]:
+    """Body and content type to upload; WebP at quality 85 when WEBP_IMAGES is on."""
+    if not WEBP_IMAGES:
+        return image_data, 'image/jpeg'
+    try:
+        img = Image.open(io.BytesIO(image_data)).convert('RGB')
+        buf = io.BytesIO()
+        img.save(buf, 'WEBP', quality=85, method=4)
+        return buf.getvalue(), 'image/webp'
+    except Exception as e:
+        print(f"    ⚠️  Failed to re-encode image, uploading original: {e}")
+        return image_data, 'image/jpeg'
+
+
+def upload_image_to_storage(image_data: bytes, filename: str,
+                            content_type: str = 'image/jpeg') -> Optional[str]:
+    """Upload image to Supabase Storage (bucket is created once by ensure_bucket())."""
     try:
-        try:
-            supabase.storage.get_bucket('ad-images')
-        except:
-            supabase.storage.create_bucket('ad-images', {'public': True})
-        
         supabase.storage.from_('ad-images').upload(
             filename,
             image_data,
-            {'content-type': 'image/jpeg', 'upsert': 'true'}
+            {'content-type': content_type, 'upsert': 'true'}
         )
         
-        public_url = supabase.storage.from_('ad-images').get_public_url(filename)
-        return public_url
+        return public_url(filename)
     except Exception as e:
         print(f"    ⚠️  Storage upload error: {e}")
         return None
 
 
-def upload_ad_creatives(week: Dict) -> tuple[int, int]:
-    """Upload ad_creatives data. Returns (record_count, image_count)."""
+# Transient failures (rate limits, Cloudflare 52x) get retried with exponential backoff
+RETRY_ATTEMPTS = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504, 520}
+
+
+async def _request_with_retries(send) -> httpx.Response:
+    """Await send() until it returns a non-transient response or attempts run out."""
+    for attempt in range(RETRY_ATTEMPTS):
+        last = attempt == RETRY_ATTEMPTS - 1
+        try:
+            resp = await send()
+            if resp.status_code not in RETRY_STATUSES or last:
+                return resp
+        except httpx.HTTPError:
+            if last:
+                raise
+        # 1s, 2s, ... capped at 10s, with jitter so parallel workers don't retry in lockstep
+        await asyncio.sleep(min(2 ** attempt, 10) + random.random())
+
+
+async def _download_async(client: httpx.AsyncClient, url: str) -> Optional[bytes]:
+    try:
+        resp = await _request_with_retries(lambda: client.get(url))
+        if resp.status_code == 200:
+            return resp.content
+    except Exception as e:
+        print(f"    ⚠️  Failed to download: {e}")
+    return None
+
+
+async def _upload_async(client: httpx.AsyncClient, image_data: bytes, filename: str,
+                        content_type: str = 'image/jpeg') -> Optional[str]:
+    """POST straight to the Storage REST endpoint so uploads share the async client."""
+    try:
+        resp = await _request_with_retries(lambda: client.post(
+            f"{SUPABASE_URL}/storage/v1/object/ad-images/{filename}",
+            content=image_data,
+            headers={
+                'Authorization': f'Bearer {SUPABASE_KEY}',
+                'apikey': SUPABASE_KEY,
+                'content-type': content_type,
+                'x-upsert': 'true',
+            },
+        ))
+        if resp.status_code in (200, 201):
+            return public_url(filename)
+        print(f"    ⚠️  Storage upload error: {resp.status_code} {resp.text[:200]}")
+    except Exception as e:
+        print(f"    ⚠️  Storage upload error: {e}")
+    return None
+
+
+async def _transfer_images(jobs: Dict[str, str]) -> Dict[str, Optional[str]]:
+    """Download every {storage_filename: image_url} job and upload it.
+    
+    Downloaders feed a bounded queue that uploaders drain, so inbound and
+    outbound transfers overlap instead of alternating per image.
+    """
+    results: Dict[str, Optional[str]] = dict.fromkeys(jobs)
+    pending = iter(jobs.items())
+    downloaded: asyncio.Queue = asyncio.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+    
+    # One client per event loop (each week thread runs its own loop)
+    async with httpx.AsyncClient(timeout=30, follow_redirects=True,
+                                 http2=_HTTP2, limits=_HTTP_LIMITS) as client:
+        async def downloader():
+            for filename, url in pending:
+                image_data = await _download_async(client, url)
+                if image_data:
+                    body, content_type = await asyncio.to_thread(encode_image, image_data)
+                    await downloaded.put((filename, body, content_type))
+        
+        async def uploader():
+            while (item := await downloaded.get()) is not None:
+                filename, body, content_type = item
+                results[filename] = await _upload_async(client, body, filename, content_type)
+        
+        uploaders = [asyncio.create_task(uploader()) for _ in range(UPLOAD_CONCURRENCY)]
+        try:
+            await asyncio.gather(*(downloader() for _ in range(DOWNLOAD_CONCURRENCY)))
+            for _ in uploaders:
+                await downloaded.put(None)
+            await asyncio.gather(*uploaders)
+        finally:
+            for task in uploaders:
+                task.cancel()
+    return results
+
+
+def transfer_images(jobs: Dict[str, str]) -> Dict[str, Optional[str]]:
+    """Copy images into storage concurrently; falls back to the synchronous helpers."""
+    if not jobs:
+        return {}
+    try:
+        return asyncio.run(_transfer_images(jobs))
+    except Exception as e:
+        print(f"    ⚠️  Concurrent transfer failed, falling back to sequential: {e}")
+    
+    downloaded = download_image_batch(list(jobs.values()))
+    results = {}
+    for filename, url in jobs.items():
+        image_data = downloaded.get(url)
+        if not image_data:
+            results[filename] = None
+            continue
+        body, content_type = encode_image(image_data)
+        results[filename] = upload_image_to_storage(body, filename, content_type)
+    return results
+
+
+# Source image URL -> public storage URL for images already copied this run
+_URL_CACHE: Dict[str, str] = {}
+
+
+@lru_cache(maxsize=4096)
+def url_hash(url: str) -> str:
+    """Short, stable key for an image URL; part of its storage filename."""
+    return hashlib.md5(url.encode()).hexdigest()[:12]
+
+
+def roas_tier(roas: float) -> str:
+    """Map ROAS to the ad_creatives performance_tier value."""
+    if roas >= 1.5:
+        return 'high'
+    return 'medium' if roas >= 1 else 'low'
+
+
+def prepare_ad_creatives(week: Dict) -> tuple[List[Dict], int]:
+    """Upload creative images and build ad_creatives rows. Returns (records, image_count)."""
     filename = f"ad_creatives_{week['date']}.json"
-    data = load_json(filename)
-    if not data:
+    data = load_json_items(filename)
+    if data is None:
         print(f"  ⚠️  {filename} not found, skipping")
-        return 0, 0
-    
-    count = 0
-    images_uploaded = 0
+        return [], 0
     
+    # One row per ad in the week (the upsert key); keep the best-ROAS duplicate
+    unique: Dict[Any, Dict] = {}
     for creative in data:
         ad_id = creative.get('ad_id') or creative.get('creative_id')
-        
+        best = unique.get(ad_id)
+        if best is None or (creative.get('roas') or 0) > (best.get('roas') or 0):
+            unique[ad_id] = creative
+    
+    records = []
+    
+    # Resolve every storage path first, then move all images in one concurrent batch.
+    # main() wipes the bucket before uploading, so only images copied earlier this run
+    # are reused, and creatives sharing an image URL share one transfer.
+    prepared = []
+    jobs = {}
+    known = {}
+    aliases = {}
+    first_for_url = {}
+    for ad_id, creative in unique.items():
         image_url = creative.get('image_url')
         if not image_url and creative.get('carousel_images'):
             image_url = creative['carousel_images'][0]
         
-        storage_url = None
+        storage_filename = None
         if image_url:
-            image_hash = hashlib.md5(image_url.encode()).hexdigest()[:12]
-            storage_filename = f"{week['date']}/{ad_id}_{image_hash}.jpg"
-            
-            image_data = download_image(image_url)
-            if image_data:
-                storage_url = upload_image_to_storage(image_data, storage_filename)
-                if storage_url:
-                    images_uploaded += 1
+            storage_filename = f"{week['date']}/{ad_id}_{url_hash(image_url)}{IMAGE_EXT}"
+            if image_url in _URL_CACHE:
+                known[storage_filename] = _URL_CACHE[image_url]
+            elif image_url in first_for_url:
+                aliases[storage_filename] = first_for_url[image_url]
+            else:
+                first_for_url[image_url] = storage_filename
+                jobs[storage_filename] = image_url
+        prepared.append((creative, ad_id, image_url, storage_filename))
+    
+    transferred = transfer_images(jobs)
+    images_uploaded = sum(1 for url in transferred.values() if url)
+    for storage_filename, url in transferred.items():
+        if url:
+            _URL_CACHE[jobs[storage_filename]] = url
+    uploaded = {**known, **transferred}
+    
+    report_date, week_start, week_end = week['date'], week['start'], week['end']
+    for creative, ad_id, image_url, storage_filename in prepared:
+        g = creative.get
+        storage_url = uploaded.get(aliases.get(storage_filename, storage_filename))
+        ad_name = g('ad_name')
+        roas = g('roas', 0)
         
         record = {
-            'report_date': week['date'],
-            'week_start': week['start'],
-            'week_end': week['end'],
-            'creative_name': creative.get('ad_name'),
+            'report_date': report_date,
+            'week_start': week_start,
+            'week_end': week_end,
+            'creative_name': ad_name,
             'ad_id': ad_id,
-            'campaign_name': creative.get('ad_name'),
+            'campaign_name': ad_name,
             'image_url': storage_url or image_url,
             'thumbnail_url': image_url,
             'metrics': {
-                'spend': creative.get('spend', 0),
-                'impressions': creative.get('impressions', 0),
-                'clicks': creative.get('clicks', 0),
-                'purchases': creative.get('purchases', 0),
-                'ctr': creative.get('ctr', 0),
-                'roas': creative.get('roas', 0),
+                'spend': g('spend', 0),
+                'impressions': g('impressions', 0),
+                'clicks': g('clicks', 0),
+                'purchases': g('purchases', 0),
+                'ctr': g('ctr', 0),
+                'roas': roas,
             },
-            'performance_tier': 'high' if creative.get('roas', 0) >= 1.5 else ('medium' if creative.get('roas', 0) >= 1 else 'low'),
-            'vision_analysis': creative.get('ai_analysis'),
+            'performance_tier': roas_tier(roas),
+            'vision_analysis': g('ai_analysis'),
             'tags': [],
         }
-        
-        try:
-            supabase.table('ad_creatives').insert(record).execute()
-            count += 1
-        except Exception as e:
-            print(f"    ⚠️  Failed to insert creative {ad_id}: {e}")
+        records.append(record)
     
-    print(f"  ✅ ad_creatives: {count} records (images: {images_uploaded})")
-    return count, images_uploaded
+    print(f"  ✅ ad_creatives: {len(records)} records queued (images: {images_uploaded})")
+    return records, images_uploaded
 
 
-def upload_ad_copies(week: Dict) -> int:
-    """Upload ad_copies data."""
+def prepare_ad_copies(week: Dict) -> List[Dict]:
+    """Build ad_copies rows."""
     filename = f"ad_copies_{week['date']}.json"
-    data = load_json(filename)
-    if not data:
+    data = load_json_items(filename)
+    if data is None:
         print(f"  ⚠️  {filename} not found, skipping")
-        return 0
+        return []
     
-    count = 0
+    records = []
+    report_date, week_start, week_end = week['date'], week['start'], week['end']
     for copy in data:
-        ad_id = copy.get('ad_id')
-        primary_text = copy.get('primary_text', '')
+        g = copy.get
+        primary_text = g('primary_text', '')
+        purchases = g('purchases', 0)
         
         record = {
-            'report_date': week['date'],
-            'week_start': week['start'],
-            'week_end': week['end'],
-            'ad_id': ad_id,
-            'campaign_name': copy.get('ad_name'),
+            'report_date': report_date,
+            'week_start': week_start,
+            'week_end': week_end,
+            'ad_id': g('ad_id'),
+            'campaign_name': g('ad_name'),
             'copy_type': 'primary_text',
             'copy_content': primary_text,
             'copy_length': len(primary_text),
             'metrics': {
-                'spend': copy.get('spend', 0),
-                'clicks': copy.get('clicks', 0),
-                'purchases': copy.get('purchases', 0),
+                'spend': g('spend', 0),
+                'clicks': g('clicks', 0),
+                'purchases': purchases,
             },
-            'performance_tier': 'high' if copy.get('purchases', 0) > 0 else 'low',
-            'analysis': copy.get('ai_analysis'),
+            'performance_tier': 'high' if purchases > 0 else 'low',
+            'analysis': g('ai_analysis'),
         }
-        
-        try:
-            supabase.table('ad_copies').insert(record).execute()
-            count += 1
-        except Exception as e:
-            print(f"    ⚠️  Failed to insert copy {ad_id}: {e}")
+        records.append(record)
     
-    print(f"  ✅ ad_copies: {count} records")
-    return count
+    print(f"  ✅ ad_copies: {len(records)} records queued")
+    return records
 
 
-def upload_weekly_insights(week: Dict) -> int:
-    """Upload weekly_insights data."""
+def prepare_weekly_insights(week: Dict) -> List[Dict]:
+    """Build the weekly_insights row (empty list if the file is missing)."""
     filename = f"weekly_insights_{week['date']}.json"
     data = load_json(filename)
     if not data:
         print(f"  ⚠️  {filename} not found, skipping")
-        return 0
+        return []
     
+    insights = {
+        'highlights': data.get('highlights', []),
+        'warnings': data.get('warnings', []),
+        'recommendations': data.get('recommendations', []),
+    }
     record = {
         'report_date': week['date'],
         'week_start': data.get('week_start', week['start']),
         'week_end': data.get('week_end', week['end']),
-        'insights': {
-            'highlights': data.get('highlights', []),
-            'warnings': data.get('warnings', []),
-            'recommendations': data.get('recommendations', []),
-        },
-        'summary': data,
+        'insights': insights,
+        # Everything else (counts, key_theme, ...); the lists are already in insights
+        'summary': {k: v for k, v in data.items() if k not in insights},
     }
     
+    print(f"  ✅ weekly_insights: 1 record queued")
+    return [record]
+
+
+def process_week(week: Dict) -> tuple[Dict[str, List[Dict]], Dict[str, int]]:
+    """Insert one week's reports row and build its child rows. Returns (pending, stats)."""
+    print(f"\n📅 Week: {week['date']} ({week['start']} ~ {week['end']})")
+    print("-" * 40)
+    
+    pending: Dict[str, List[Dict]] = defaultdict(list)
+    stats = {'reports': 0, 'images': 0}
+    
+    # The reports row must exist before its children reference report_id
+    report_id = upload_report_data(week, pending)
+    if report_id:
+        stats['reports'] += 1
+    
+    records, imgs = prepare_ad_creatives(week)
+    pending['ad_creatives'].extend(records)
+    stats['images'] += imgs
+    
+    pending['ad_copies'].extend(prepare_ad_copies(week))
+    pending['weekly_insights'].extend(prepare_weekly_insights(week))
+    return pending, stats
+
+
+async def _process_all_weeks() -> List[tuple]:
+    """Run process_week for every week concurrently; returns (pending, stats, log) per week."""
+    stdout = ThreadLocalStdout(sys.stdout)
+    sem = asyncio.Semaphore(WEEK_CONCURRENCY)
+    
+    def run(week: Dict) -> tuple:
+        stdout.capture()
+        try:
+            pending, stats = process_week(week)
+        except Exception as e:
+            print(f"  ⚠️  Week {week['date']} failed: {e}")
+            pending, stats = {}, {}
+        return pending, stats, stdout.release()
+    
+    async def run_limited(week: Dict) -> tuple:
+        async with sem:
+            return await asyncio.to_thread(run, week)
+    
+    sys.stdout = stdout
     try:
-        supabase.table('weekly_insights').insert(record).execute()
-        print(f"  ✅ weekly_insights: 1 record")
-        return 1
-    except Exception as e:
-        print(f"    ⚠️  Failed to insert weekly_insights: {e}")
-        return 0
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(run_limited(w)) for w in WEEKS]
+    finally:
+        sys.stdout = stdout._target
+    return [t.result() for t in tasks]
 
 
 def main():
@@ -419,23 +765,26 @@ def main():
         'images': 0,
     }
     
-    for week in WEEKS:
-        print(f"\n📅 Week: {week['date']} ({week['start']} ~ {week['end']})")
-        print("-" * 40)
-        
-        report_id = upload_report_data(week)
-        if report_id:
-            total_stats['reports'] += 1
-        
-        count, imgs = upload_ad_creatives(week)
-        total_stats['ad_creatives'] += count
-        total_stats['images'] += imgs
-        
-        count = upload_ad_copies(week)
-        total_stats['ad_copies'] += count
-        
-        count = upload_weekly_insights(week)
-        total_stats['weekly_insights'] += count
+    ensure_bucket()
+    ensure_bucket('reports', public=False)
+    
+    # Pass 1: weeks run concurrently; each inserts its reports row (children need
+    # its id) and collects child rows. Logs are printed per week, in order.
+    pending: Dict[str, List[Dict]] = defaultdict(list)
+    for week_pending, stats, log in asyncio.run(_process_all_weeks()):
+        print(log, end='')
+        for table, records in week_pending.items():
+            pending[table].extend(records)
+        for key, value in stats.items():
+            total_stats[key] += value
+    
+    # Pass 2: one bulk insert per table across all weeks
+    print("\n📤 Bulk inserting collected rows...")
+    for table, records in pending.items():
+        count = insert_records(table, records)
+        print(f"  ✅ {table}: {count} records")
+        if table in total_stats:
+            total_stats[table] = count
     
     print("\n" + "=" * 60)
     print("📊 Final Summary")
@@ -7,6 +7,8 @@ import os
 import sys
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Load environment variables
 env_path = os.path.join(os.path.dirname(__file__), '..', '.env.local')
@@ -26,6 +28,14 @@ headers = {
     'Prefer': 'return=minimal'
 }
 
+# One keep-alive session for every call; retries transient gateway errors.
+# POST is included because the storage list call is read-only.
+session = requests.Session()
+session.headers.update(headers)
+retry = Retry(total=5, backoff_factor=0.3, status_forcelist=[502, 503, 504, 520],
+              allowed_methods=['GET', 'POST', 'DELETE'], raise_on_status=False)
+session.mount('https://', HTTPAdapter(max_retries=retry, pool_connections=16, pool_maxsize=32))
+
 # Tables to clear in order (dependencies first)
 TABLES = [
     'weekly_insights',
@@ -40,50 +50,70 @@ TABLES = [
     'reports'
 ]
 
+# Primary key of each table, used for the match-all filter
+PK_BY_TABLE = {table: 'id' for table in TABLES}
+
 def clear_table(table_name):
-    """Delete all rows from a table."""
+    """Delete all rows from a table in one request (return=minimal, no rows sent back)."""
     url = f"{SUPABASE_URL}/rest/v1/{table_name}"
-    # Use neq filter to match all rows
-    params = {'id': 'neq.00000000-0000-0000-0000-000000000000'}
-    
-    # First try with id column
-    response = requests.delete(url, headers=headers, params=params)
-    
-    if response.status_code == 400:
-        # Table might not have 'id' column, try without filter (delete all)
-        # For tables without id, we need to find their primary key
-        # Try common column names
-        for col in ['report_id', 'name', 'created_at']:
-            params = {col: f'neq.___impossible___'}
-            response = requests.delete(url, headers=headers, params=params)
-            if response.status_code in [200, 204]:
-                break
-    
+    # PostgREST refuses unfiltered DELETEs, so match every row on the primary key
+    params = {PK_BY_TABLE[table_name]: 'neq.00000000-0000-0000-0000-000000000000'}
+    response = session.delete(url, params=params)
     return response.status_code in [200, 204]
 
+LIST_PAGE_SIZE = 1000
+DELETE_BATCH_SIZE = 500
+
+def list_bucket_files(bucket_name, prefix=''):
+    """Every file path under prefix, paging and descending into folders only."""
+    list_url = f"{SUPABASE_URL}/storage/v1/object/list/{bucket_name}"
+    files = []
+    offset = 0
+    while True:
+        response = session.post(list_url,
+                                json={'prefix': prefix, 'limit': LIST_PAGE_SIZE, 'offset': offset})
+        response.raise_for_status()
+        items = response.json()
+        for item in items:
+            path = f"{prefix}/{item['name']}" if prefix else item['name']
+            # Folders come back without an id; only they need another listing
+            if item.get('id') is None:
+                files.extend(list_bucket_files(bucket_name, path))
+            else:
+                files.append(path)
+        if len(items) < LIST_PAGE_SIZE:
+            return files
+        offset += LIST_PAGE_SIZE
+
 def clear_storage_bucket(bucket_name):
     """Clear all files from a storage bucket."""
-    # List all files in the bucket
-    list_url = f"{SUPABASE_URL}/storage/v1/object/list/{bucket_name}"
-    
-    response = requests.post(list_url, headers=headers, json={'prefix': '', 'limit': 1000})
-    
-    if response.status_code != 200:
-        print(f"  ⚠️  Could not list files in bucket '{bucket_name}': {response.status_code}")
+    try:
+        files = list_bucket_files(bucket_name)
+    except requests.RequestException as e:
+        print(f"  ⚠️  Could not list files in bucket '{bucket_name}': {e}")
         return False
     
-    files = response.json()
     if not files:
         print(f"  ℹ️  Bucket '{bucket_name}' is already empty")
         return True
     
-    # Delete each file
+    # Bulk delete in chunks; the response lists the objects actually removed
     deleted_count = 0
-    for file_obj in files:
-        file_name = file_obj.get('name')
-        if file_name:
+    bulk_url = f"{SUPABASE_URL}/storage/v1/object/{bucket_name}"
+    for i in range(0, len(files), DELETE_BATCH_SIZE):
+        chunk = files[i:i+DELETE_BATCH_SIZE]
+        response = session.delete(bulk_url, json={'prefixes': chunk})
+        if response.status_code == 200:
+            deleted_count += len(response.json())
+            continue
+        if response.status_code != 400:
+            print(f"  ⚠️  Bulk delete failed: {response.status_code}")
+            continue
+        
+        # Bulk endpoint rejected the request; delete this chunk one file at a time
+        for file_name in chunk:
             delete_url = f"{SUPABASE_URL}/storage/v1/object/{bucket_name}/{file_name}"
-            del_response = requests.delete(delete_url, headers=headers)
+            del_response = session.delete(delete_url)
             if del_response.status_code in [200, 204]:
                 deleted_count += 1
     
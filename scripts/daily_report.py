@@ -1,16 +1,30 @@
 import os
 import json
+import time
+import heapq
+import hashlib
+import threading
+from pathlib import Path
 import requests
 import argparse
+from collections import defaultdict
+from functools import lru_cache, wraps
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
-from google.analytics.data_v1beta import BetaAnalyticsDataClient
-from google.analytics.data_v1beta.types import (
-    DateRange,
-    Dimension,
-    Metric,
-    RunReportRequest,
-)
+try:
+    import orjson
+except ImportError:  # Optional: falls back to stdlib json
+    orjson = None
+try:
+    import ijson
+except ImportError:  # Optional: Cyberbiz pages are parsed whole instead of streamed
+    ijson = None
+# GA4 SDK、googleapiclient、BeautifulSoup 載入較慢，改在用到的函式內才 import
+# （例如 fetch_daily_aov.py 只用 Cyberbiz，不必付出這些 import 成本）
 
 # Configuration
 META_ACCESS_TOKEN = os.environ.get("META_ACCESS_TOKEN")
@@ -23,33 +37,292 @@ CYBERBIZ_TOKEN = os.environ.get("CYBERBIZ_TOKEN")
 GSC_KEY_PATH = os.environ.get("GSC_KEY_PATH", os.environ.get("GA4_KEY_PATH"))  # 可共用同一個 Service Account
 GSC_SITE_URL = os.environ.get("GSC_SITE_URL")  # 例如 "https://example.com" 或 "sc-domain:example.com"
 
-def parse_insight(insight):
-    # Parse ROAS
-    roas = 0.0
-    if "purchase_roas" in insight:
-        for item in insight["purchase_roas"]:
-            if item["action_type"] == "omni_purchase":
-                roas = float(item["value"])
-    
-    # Parse Actions
-    atc = 0
-    ic = 0
-    vc = 0
+GRAPH_API_URL = "https://graph.facebook.com/v21.0"
+
+# json.dump 逐段寫出許多小字串，用 1 MB 緩衝合併成少數幾次 write()
+WRITE_BUFFER_SIZE = 1 << 20
+
+# 所有 Meta API 呼叫共用的 keep-alive 連線池；GET 遇到 429/5xx 自動退避重試
+# （平行呼叫時 requests 在等待 socket 時會釋放 GIL）
+META_MAX_WORKERS = 16
+META_TIMEOUT = 30
+META_SESSION = requests.Session()
+META_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504],
+                      raise_on_status=False)
+))
+
+# 其餘 HTTP 呼叫（Cyberbiz 分頁、GSC 頁面標題、素材圖片下載）共用的 keep-alive 連線池
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504],
+                      raise_on_status=False)
+))
+
+def _loads(raw):
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+
+def _dumps(obj):
+    """序列化 query 參數（time_range / filtering / batch 等）"""
+    return orjson.dumps(obj).decode() if orjson else json.dumps(obj)
+
+
+@lru_cache(maxsize=32)
+def _time_range(start_date, end_date):
+    """time_range 參數字串；同一區間在各 Meta 呼叫間只序列化一次"""
+    return _dumps({"since": start_date, "until": end_date})
+
+
+def _meta_json(resp):
+    """解析 Meta API 回應（有 orjson 時直接從 bytes 解析）"""
+    return _loads(resp.content)
+
+
+# [OPTIONAL] Meta GET 回應快取：設定 REPORT_CACHE_DIR 才啟用（開發時重跑 / 失敗重試不必重打 API）
+REPORT_CACHE_DIR = os.environ.get("REPORT_CACHE_DIR")
+CACHE_TTL_SECONDS = 6 * 3600
+# 超過歸因窗口的區間數據不再變動，可永久快取
+ATTRIBUTION_WINDOW_DAYS = 28
+
+def _until_ttl(until, ttl=CACHE_TTL_SECONDS):
+    """依區間結束日決定快取秒數；已關帳的舊區間回傳 None（不過期）"""
+    closed_before = datetime.now() - timedelta(days=ATTRIBUTION_WINDOW_DAYS)
+    if datetime.strptime(until, "%Y-%m-%d") < closed_before:
+        return None
+    return ttl
+
+
+def _cache_ttl(params):
+    """依 time_range 決定快取秒數；已關帳的舊區間回傳 None（不過期）"""
+    try:
+        return _until_ttl(_loads(params["time_range"])["until"])
+    except (KeyError, TypeError, ValueError):
+        return CACHE_TTL_SECONDS
+
+
+# 整個區間結果的快取：daily 模式的 DoD 比較日就是前一次執行的當期，48 小時內可直接沿用
+PERIOD_CACHE_TTL_SECONDS = 48 * 3600
+
+def _period_cache_file(name, start_date, end_date):
+    return Path(REPORT_CACHE_DIR) / "periods" / f"{name}_{start_date}_{end_date}.json"
+
+
+def _store_period_result(name, start_date, end_date, result):
+    if REPORT_CACHE_DIR:
+        cache_file = _period_cache_file(name, start_date, end_date)
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_bytes(_dumps(result).encode())
+
+
+def _cached_by_period(is_valid=lambda result: True):
+    """
+    [OPTIONAL] 以 (函式名稱, start_date, end_date) 快取整個區間的結果（REPORT_CACHE_DIR/periods 下的 JSON 檔）
+    is_valid 回傳 False 的結果（例如 API 失敗時的空資料）不寫入快取；未設定 REPORT_CACHE_DIR 時不作用
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(start_date, end_date):
+            if REPORT_CACHE_DIR:
+                cache_file = _period_cache_file(func.__name__, start_date, end_date)
+                if cache_file.exists():
+                    ttl = _until_ttl(end_date, PERIOD_CACHE_TTL_SECONDS)
+                    if ttl is None or time.time() - cache_file.stat().st_mtime < ttl:
+                        return _loads(cache_file.read_bytes())
+            result = func(start_date, end_date)
+            if is_valid(result):
+                _store_period_result(func.__name__, start_date, end_date, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def _meta_get(url, params=None):
+    """
+    Meta API GET 並解析 JSON；啟用快取時以 (url, params) 的 sha256 為 key 存成檔案
+    錯誤回應不快取
+    """
+    params = params or {}
+    cache_file = None
+    if REPORT_CACHE_DIR:
+        key_params = sorted((k, str(v)) for k, v in params.items() if k != "access_token")
+        key = hashlib.sha256(_dumps([url, key_params]).encode()).hexdigest()
+        cache_file = Path(REPORT_CACHE_DIR) / "meta" / f"{key}.json"
+        if cache_file.exists():
+            ttl = _cache_ttl(params)
+            if ttl is None or time.time() - cache_file.stat().st_mtime < ttl:
+                return _loads(cache_file.read_bytes())
+    
+    resp = META_SESSION.get(url, params=params, timeout=META_TIMEOUT)
+    data = _loads(resp.content)
+    if cache_file and resp.ok and "error" not in data:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_bytes(resp.content)
+    return data
+
+
+def _meta_batch(relative_urls):
+    """
+    以 Graph API Batch Requests 一次送出多個 GET（最多 50 個）
+    回傳與 relative_urls 同順序的 JSON body；子請求失敗時為含 "error" 的 dict
+    """
+    batch = [{"method": "GET", "relative_url": url} for url in relative_urls]
+    resp = _meta_json(META_SESSION.post(GRAPH_API_URL, data={
+        "access_token": META_ACCESS_TOKEN,
+        "batch": _dumps(batch),
+    }, timeout=META_TIMEOUT))
+    if not isinstance(resp, list):
+        # 整批失敗（例如 token 無效），每個子請求都回傳同一個錯誤
+        return [resp] * len(relative_urls)
+    
+    results = []
+    for item in resp:
+        if not item:
+            results.append({"error": "no response (timed out in batch)"})
+            continue
+        body = _loads(item.get("body") or "{}")
+        if item.get("code") != 200 and "error" not in body:
+            body["error"] = f"HTTP {item.get('code')}"
+        results.append(body)
+    return results
+
+
+# 日期區間超過此天數時改用非同步 insights job，避免同步 GET 逾時或吃到速率限制
+ASYNC_INSIGHTS_MIN_DAYS = 7
+ASYNC_INSIGHTS_POLL_SECONDS = 2
+ASYNC_INSIGHTS_TIMEOUT_SECONDS = 600
+
+def _use_async_insights(start_date, end_date):
+    span = datetime.strptime(end_date, "%Y-%m-%d") - datetime.strptime(start_date, "%Y-%m-%d")
+    return span.days > ASYNC_INSIGHTS_MIN_DAYS
+
+
+def _meta_get_all(url, params=None):
+    """
+    依 paging.next 逐頁取回所有結果，合併成 {"data": [...]}；任一頁錯誤則回傳該錯誤
+    """
+    rows = []
+    resp = _meta_get(url, params)
+    while True:
+        if "error" in resp:
+            return resp
+        rows.extend(resp.get("data", []))
+        next_url = resp.get("paging", {}).get("next")
+        if not next_url:
+            return {"data": rows}
+        resp = _meta_get(next_url)
+
+
+def _run_async_insights(params, node=None):
+    """
+    以非同步 job 執行 insights 查詢：POST 建立 report run → 輪詢狀態 → 分頁取回全部結果
+    回傳格式與同步 GET 相同（{"data": [...]}）
+    """
+    node = node or META_AD_ACCOUNT_ID
+    params = {**params, "access_token": META_ACCESS_TOKEN}
+    params.pop("limit", None)
+    job = _meta_json(META_SESSION.post(f"{GRAPH_API_URL}/{node}/insights", data=params, timeout=META_TIMEOUT))
+    report_run_id = job.get("report_run_id")
+    if not report_run_id:
+        return job  # 含 error，交給呼叫端處理
+    
+    deadline = time.monotonic() + ASYNC_INSIGHTS_TIMEOUT_SECONDS
+    while True:
+        # 輪詢狀態不可快取
+        status = _meta_json(META_SESSION.get(f"{GRAPH_API_URL}/{report_run_id}", params={
+            "access_token": META_ACCESS_TOKEN,
+            "fields": "async_status,async_percent_completion"
+        }, timeout=META_TIMEOUT))
+        async_status = status.get("async_status")
+        if async_status == "Job Completed":
+            break
+        if async_status in ("Job Failed", "Job Skipped") or "error" in status:
+            return {"error": status.get("error") or async_status}
+        if time.monotonic() > deadline:
+            return {"error": f"async insights job {report_run_id} timed out"}
+        time.sleep(ASYNC_INSIGHTS_POLL_SECONDS)
+    
+    return _meta_get_all(f"{GRAPH_API_URL}/{report_run_id}/insights", {
+        "access_token": META_ACCESS_TOKEN,
+        "limit": 500
+    })
+
+
+def _get_insights(params, start_date, end_date, node=None):
+    """
+    insights 查詢入口：短區間用同步 GET（跟隨分頁取完），長區間改用非同步 job
+    """
+    if _use_async_insights(start_date, end_date):
+        return _run_async_insights(params, node)
+    params = {**params, "access_token": META_ACCESS_TOKEN}
+    return _meta_get_all(f"{GRAPH_API_URL}/{node or META_AD_ACCOUNT_ID}/insights", params)
+
+
+def _insights_url(params, node=None):
+    """組出 batch 用的 insights relative_url（access_token 由 batch 本身帶）"""
+    return f"{node or META_AD_ACCOUNT_ID}/insights?{urlencode(params)}"
+
+
+# 各 Meta 查詢使用的 fields / breakdowns（模組層級常數，各函式共用）
+_INSIGHT_FIELDS_CAMPAIGN = "campaign_name,campaign_id,spend,ctr,inline_link_clicks,purchase_roas,actions,action_values"
+_INSIGHT_FIELDS_AUDIENCE = "spend,impressions,clicks,actions"
+_INSIGHT_FIELDS_EFFICIENCY = "spend,impressions,reach,frequency,cpm"
+_INSIGHT_FIELDS_ADSET = "adset_id,adset_name,spend,impressions,reach,ctr,purchase_roas,actions,cpm,clicks"
+_INSIGHT_FIELDS_ADSET_DIST = "adset_id,spend"
+_INSIGHT_FIELDS_AD = "ad_id,ad_name,spend,impressions,clicks,ctr,cpm,purchase_roas,actions,action_values"
+_AUDIENCE_BREAKDOWNS = ("age", "gender", "region", "age,gender")
+_ADSET_FIELDS_TARGETING = "id,name,targeting"
+_AD_FIELDS_CREATIVE = "id,name,creative{id,title,body,object_story_spec,effective_object_story_id,image_url,thumbnail_url,asset_feed_spec,video_id}"
+
+# action_type → parse_insight 欄位名稱
+_ACTION_FIELDS = {
+    "omni_add_to_cart": "atc",
+    "omni_initiated_checkout": "ic",
+    "omni_view_content": "vc",
+    "omni_purchase": "purchases",
+}
+
+def _extract_actions(actions):
+    """單次掃描 actions 陣列，回傳 {atc, ic, vc, purchases}（同一 action_type 以最後一筆為準）"""
+    vals = dict.fromkeys(_ACTION_FIELDS.values(), 0)
+    for item in actions or ():
+        field = _ACTION_FIELDS.get(item.get("action_type"))
+        if field:
+            vals[field] = int(item["value"])
+    return vals
+
+
+def _extract_purchases(actions):
+    """actions 陣列中的 omni_purchase 次數"""
     purchases = 0
-    if "actions" in insight:
-        for item in insight["actions"]:
-            val = int(item["value"])
-            if item["action_type"] == "omni_add_to_cart": atc = val
-            elif item["action_type"] == "omni_initiated_checkout": ic = val
-            elif item["action_type"] == "omni_view_content": vc = val
-            elif item["action_type"] == "omni_purchase": purchases = val
-    
-    # Parse Conversion Value
-    conv_value = 0.0
-    if "action_values" in insight:
-        for item in insight["action_values"]:
-            if item["action_type"] == "omni_purchase":
-                conv_value = float(item["value"])
+    for item in actions or ():
+        if item.get("action_type") == "omni_purchase":
+            purchases = int(item["value"])
+    return purchases
+
+
+def _omni_purchase_value(items):
+    """purchase_roas / action_values 陣列中的 omni_purchase 數值"""
+    value = 0.0
+    for item in items or ():
+        if item.get("action_type") == "omni_purchase":
+            value = float(item["value"])
+    return value
+
+
+def _cost_per(spend, count):
+    """每次成效成本（CPA、每次加購成本）；沒有成效時為 0"""
+    return spend / count if count > 0 else 0
+
+
+def parse_insight(insight):
+    roas = _omni_purchase_value(insight.get("purchase_roas"))
+    vals = _extract_actions(insight.get("actions"))
+    atc, ic, vc, purchases = vals["atc"], vals["ic"], vals["vc"], vals["purchases"]
+    conv_value = _omni_purchase_value(insight.get("action_values"))
     
     spend = float(insight.get("spend", 0))
     return {
@@ -63,35 +336,45 @@ def parse_insight(insight):
         "ic": ic,
         "vc": vc,
         "conv_value": conv_value,
-        "cpa": spend / purchases if purchases > 0 else 0,
-        "cp_atc": spend / atc if atc > 0 else 0
+        "cpa": _cost_per(spend, purchases),
+        "cp_atc": _cost_per(spend, atc)
     }
 
+def parse_insights(rows, id_field=None):
+    """
+    批次解析 insights 列：每列只解析一次，無花費的列先略過、不建立結果 dict
+    id_field 有值時保留該 ID 欄位（例如 campaign_id）
+    """
+    parsed = []
+    for item in rows:
+        if float(item.get("spend", 0)) <= 0:
+            continue
+        p = parse_insight(item)
+        if id_field:
+            p[id_field] = item.get(id_field)
+        parsed.append(p)
+    return parsed
+
+
+@_cached_by_period(is_valid=lambda result: result["total"] is not None)
 def get_meta_data(start_date, end_date):
-    acc_url = f"https://graph.facebook.com/v21.0/{META_AD_ACCOUNT_ID}/insights"
     params = {
-        "access_token": META_ACCESS_TOKEN,
-        "time_range": json.dumps({"since": start_date, "until": end_date}),
-        "fields": "campaign_name,campaign_id,spend,ctr,inline_link_clicks,purchase_roas,actions,action_values",
+        "time_range": _time_range(start_date, end_date),
+        "fields": _INSIGHT_FIELDS_CAMPAIGN,
     }
     
-    # 1. Account Total
-    acc_resp = requests.get(acc_url, params=params).json()
-    account_total = parse_insight(acc_resp["data"][0]) if "data" in acc_resp and acc_resp["data"] else None
-
-    # 2. Campaigns
+    # 1. Account Total + 2. Campaigns，同一個 batch request 取回
     camp_params = params.copy()
     camp_params["level"] = "campaign"
-    camp_resp = requests.get(acc_url, params=camp_params).json()
-    
-    campaigns = []
-    if "data" in camp_resp:
-        for item in camp_resp["data"]:
-            if float(item.get("spend", 0)) > 0:
-                p = parse_insight(item)
-                p["campaign_id"] = item.get("campaign_id") # Keep ID
-                campaigns.append(p)
-                
+    if _use_async_insights(start_date, end_date):
+        acc_resp = _get_insights(params, start_date, end_date)
+        camp_resp = _get_insights(camp_params, start_date, end_date)
+    else:
+        acc_resp, camp_resp = _meta_batch([_insights_url(params), _insights_url(camp_params)])
+    account_total = parse_insight(acc_resp["data"][0]) if "data" in acc_resp and acc_resp["data"] else None
+
+    campaigns = parse_insights(camp_resp.get("data", []), id_field="campaign_id")
+    
     return {
         "total": account_total,
         "campaigns": campaigns
@@ -103,8 +386,7 @@ def get_meta_audience_breakdown(start_date, end_date):
     [NEW] 取得 Meta Ads 受眾數據分布（年齡、性別、地區）
     使用 breakdown 參數分析廣告受眾
     """
-    base_url = f"https://graph.facebook.com/v21.0/{META_AD_ACCOUNT_ID}/insights"
-    time_range = json.dumps({"since": start_date, "until": end_date})
+    time_range = _time_range(start_date, end_date)
     
     audience_data = {
         "age": [],
@@ -113,22 +395,27 @@ def get_meta_audience_breakdown(start_date, end_date):
         "age_gender": []
     }
     
+    # 四種 breakdown 合併成一個 batch request
+    try:
+        age_resp, gender_resp, region_resp, ag_resp = _meta_batch([
+            _insights_url({
+                "time_range": time_range,
+                "fields": _INSIGHT_FIELDS_AUDIENCE,
+                "breakdowns": breakdown
+            })
+            for breakdown in _AUDIENCE_BREAKDOWNS
+        ])
+    except Exception as e:
+        print(f"Error fetching audience breakdowns: {e}")
+        return audience_data
+    
     # 1. Age breakdown
-    age_params = {
-        "access_token": META_ACCESS_TOKEN,
-        "time_range": time_range,
-        "fields": "spend,impressions,clicks,actions",
-        "breakdowns": "age"
-    }
     try:
-        age_resp = requests.get(base_url, params=age_params).json()
+        if "error" in age_resp:
+            raise RuntimeError(age_resp["error"])
         if "data" in age_resp:
             for item in age_resp["data"]:
-                purchases = 0
-                if "actions" in item:
-                    for action in item["actions"]:
-                        if action["action_type"] == "omni_purchase":
-                            purchases = int(action["value"])
+                purchases = _extract_purchases(item.get("actions"))
                 audience_data["age"].append({
                     "age_range": item.get("age", "Unknown"),
                     "spend": float(item.get("spend", 0)),
@@ -140,21 +427,12 @@ def get_meta_audience_breakdown(start_date, end_date):
         print(f"Error fetching age breakdown: {e}")
     
     # 2. Gender breakdown
-    gender_params = {
-        "access_token": META_ACCESS_TOKEN,
-        "time_range": time_range,
-        "fields": "spend,impressions,clicks,actions",
-        "breakdowns": "gender"
-    }
     try:
-        gender_resp = requests.get(base_url, params=gender_params).json()
+        if "error" in gender_resp:
+            raise RuntimeError(gender_resp["error"])
         if "data" in gender_resp:
             for item in gender_resp["data"]:
-                purchases = 0
-                if "actions" in item:
-                    for action in item["actions"]:
-                        if action["action_type"] == "omni_purchase":
-                            purchases = int(action["value"])
+                purchases = _extract_purchases(item.get("actions"))
                 audience_data["gender"].append({
                     "gender": item.get("gender", "Unknown"),
                     "spend": float(item.get("spend", 0)),
@@ -166,21 +444,12 @@ def get_meta_audience_breakdown(start_date, end_date):
         print(f"Error fetching gender breakdown: {e}")
     
     # 3. Region breakdown (country + region)
-    region_params = {
-        "access_token": META_ACCESS_TOKEN,
-        "time_range": time_range,
-        "fields": "spend,impressions,clicks,actions",
-        "breakdowns": "region"
-    }
     try:
-        region_resp = requests.get(base_url, params=region_params).json()
+        if "error" in region_resp:
+            raise RuntimeError(region_resp["error"])
         if "data" in region_resp:
             for item in region_resp["data"]:
-                purchases = 0
-                if "actions" in item:
-                    for action in item["actions"]:
-                        if action["action_type"] == "omni_purchase":
-                            purchases = int(action["value"])
+                purchases = _extract_purchases(item.get("actions"))
                 audience_data["region"].append({
                     "region": item.get("region", "Unknown"),
                     "spend": float(item.get("spend", 0)),
@@ -189,30 +458,19 @@ def get_meta_audience_breakdown(start_date, end_date):
                     "purchases": purchases
                 })
             # Sort by spend and keep top 10
-            audience_data["region"] = sorted(
-                audience_data["region"], 
-                key=lambda x: x["spend"], 
-                reverse=True
-            )[:10]
+            audience_data["region"] = heapq.nlargest(
+                10, audience_data["region"], key=lambda x: x["spend"]
+            )
     except Exception as e:
         print(f"Error fetching region breakdown: {e}")
     
     # 4. Age + Gender combined breakdown
-    age_gender_params = {
-        "access_token": META_ACCESS_TOKEN,
-        "time_range": time_range,
-        "fields": "spend,impressions,clicks,actions",
-        "breakdowns": "age,gender"
-    }
     try:
-        ag_resp = requests.get(base_url, params=age_gender_params).json()
+        if "error" in ag_resp:
+            raise RuntimeError(ag_resp["error"])
         if "data" in ag_resp:
             for item in ag_resp["data"]:
-                purchases = 0
-                if "actions" in item:
-                    for action in item["actions"]:
-                        if action["action_type"] == "omni_purchase":
-                            purchases = int(action["value"])
+                purchases = _extract_purchases(item.get("actions"))
                 audience_data["age_gender"].append({
                     "age_range": item.get("age", "Unknown"),
                     "gender": item.get("gender", "Unknown"),
@@ -232,25 +490,27 @@ def get_meta_efficiency_metrics(start_date, end_date):
     [NEW] 取得 Meta Ads 效率指標：CPM, Frequency, Reach, Impressions
     這些指標對於判斷廣告疲乏和成本控制至關重要
     """
-    base_url = f"https://graph.facebook.com/v21.0/{META_AD_ACCOUNT_ID}/insights"
+    base_url = f"{GRAPH_API_URL}/{META_AD_ACCOUNT_ID}/insights"
     params = {
         "access_token": META_ACCESS_TOKEN,
-        "time_range": json.dumps({"since": start_date, "until": end_date}),
-        "fields": "spend,impressions,reach,frequency,cpm"
+        "time_range": _time_range(start_date, end_date),
+        "fields": _INSIGHT_FIELDS_EFFICIENCY
     }
     
     try:
-        resp = requests.get(base_url, params=params).json()
+        resp = _meta_get(base_url, params)
         if "data" in resp and resp["data"]:
             data = resp["data"][0]
+            frequency = float(data.get("frequency", 0))
+            cpm = float(data.get("cpm", 0))
             return {
                 "impressions": int(data.get("impressions", 0)),
                 "reach": int(data.get("reach", 0)),
-                "frequency": float(data.get("frequency", 0)),
-                "cpm": float(data.get("cpm", 0)),
+                "frequency": frequency,
+                "cpm": cpm,
                 # 警示判斷
-                "frequency_warning": float(data.get("frequency", 0)) > 2.5,
-                "cpm_warning": float(data.get("cpm", 0)) > 300  # CPM > 300 需關注
+                "frequency_warning": frequency > 2.5,
+                "cpm_warning": cpm > 300  # CPM > 300 需關注
             }
     except Exception as e:
         print(f"Error fetching efficiency metrics: {e}")
@@ -261,6 +521,11 @@ def get_meta_efficiency_metrics(start_date, end_date):
     }
 
 
+# targeting 代碼 → 顯示名稱
+_GENDER_MAP = {1: "男", 2: "女"}
+_COUNTRY_MAP = {"TW": "台灣", "HK": "香港", "JP": "日本", "US": "美國", "SG": "新加坡", "MY": "馬來西亞"}
+
+
 def parse_targeting(raw_targeting):
     """
     [NEW] 簡化 Meta Ads targeting 資料格式
@@ -281,9 +546,8 @@ def parse_targeting(raw_targeting):
     
     # 2. 性別
     genders = raw_targeting.get("genders", [])
-    gender_map = {1: "男", 2: "女"}
     if genders:
-        result["genders"] = [gender_map.get(g, str(g)) for g in genders]
+        result["genders"] = [_GENDER_MAP.get(g, str(g)) for g in genders]
     else:
         result["genders"] = ["不限"]
     
@@ -292,22 +556,14 @@ def parse_targeting(raw_targeting):
     locations = []
     # 國家
     countries = geo_locations.get("countries", [])
-    country_map = {"TW": "台灣", "HK": "香港", "JP": "日本", "US": "美國", "SG": "新加坡", "MY": "馬來西亞"}
     for c in countries:
-        locations.append(country_map.get(c, c))
-    # 地區/城市
-    regions = geo_locations.get("regions", [])
-    for r in regions:
-        if isinstance(r, dict):
-            locations.append(r.get("name", str(r)))
-        else:
+        locations.append(_COUNTRY_MAP.get(c, c))
+    # 地區/城市（通常是含 name 的 dict，其餘直接轉字串）
+    for r in geo_locations.get("regions", []) + geo_locations.get("cities", []):
+        try:
+            locations.append(r["name"])
+        except (TypeError, KeyError):
             locations.append(str(r))
-    cities = geo_locations.get("cities", [])
-    for city in cities:
-        if isinstance(city, dict):
-            locations.append(city.get("name", str(city)))
-        else:
-            locations.append(str(city))
     result["locations"] = locations if locations else ["未指定"]
     
     # 4. 興趣
@@ -361,36 +617,23 @@ def get_meta_adset_data(start_date, end_date):
     用於分析哪個受眾定向最有效
     包含 targeting（受眾設定）資料和受眾分布數據
     """
-    base_url = f"https://graph.facebook.com/v21.0/{META_AD_ACCOUNT_ID}/insights"
     params = {
-        "access_token": META_ACCESS_TOKEN,
-        "time_range": json.dumps({"since": start_date, "until": end_date}),
-        "fields": "adset_id,adset_name,spend,impressions,reach,ctr,purchase_roas,actions,cpm,clicks",
+        "time_range": _time_range(start_date, end_date),
+        "fields": _INSIGHT_FIELDS_ADSET,
         "level": "adset",
         "limit": 20
     }
     
     adsets = []
-    adset_ids = []  # 收集有花費的 adset_id
+    adset_ids = []  # Top 10 adset 的 adset_id
     try:
-        resp = requests.get(base_url, params=params).json()
+        resp = _get_insights(params, start_date, end_date)
         if "data" in resp:
             for item in resp["data"]:
                 spend = float(item.get("spend", 0))
                 if spend > 0:
-                    # Parse ROAS
-                    roas = 0.0
-                    if "purchase_roas" in item:
-                        for r in item["purchase_roas"]:
-                            if r["action_type"] == "omni_purchase":
-                                roas = float(r["value"])
-                    
-                    # Parse purchases
-                    purchases = 0
-                    if "actions" in item:
-                        for action in item["actions"]:
-                            if action["action_type"] == "omni_purchase":
-                                purchases = int(action["value"])
+                    roas = _omni_purchase_value(item.get("purchase_roas"))
+                    purchases = _extract_purchases(item.get("actions"))
                     
                     adset_id = item.get("adset_id")
                     adsets.append({
@@ -404,38 +647,37 @@ def get_meta_adset_data(start_date, end_date):
                         "cpm": float(item.get("cpm", 0)),
                         "roas": roas,
                         "purchases": purchases,
-                        "cpa": spend / purchases if purchases > 0 else 0,
+                        "cpa": _cost_per(spend, purchases),
                         "targeting": None,  # 先初始化，稍後填入
                         # [NEW] 受眾分布數據（稍後填入）
                         "age_distribution": [],
                         "gender_distribution": [],
                         "interests": []
                     })
-                    if adset_id:
-                        adset_ids.append(adset_id)
         
-        # Sort by ROAS descending
-        adsets.sort(key=lambda x: x["roas"], reverse=True)
+        # 只保留 ROAS 最高的 10 個（依 ROAS 由高到低）
+        adsets = heapq.nlargest(10, adsets, key=lambda x: x["roas"])
+        adset_ids = [adset["adset_id"] for adset in adsets if adset.get("adset_id")]
     except Exception as e:
         print(f"Error fetching adset data: {e}")
     
-    # [NEW] 取得 targeting 資料
+    # [NEW] 取得 targeting 資料（只查 Top 10）
     if adset_ids:
         try:
             targeting_map = {}
             # 呼叫 adsets API 取得 targeting 欄位
-            adsets_url = f"https://graph.facebook.com/v21.0/{META_AD_ACCOUNT_ID}/adsets"
+            adsets_url = f"{GRAPH_API_URL}/{META_AD_ACCOUNT_ID}/adsets"
             targeting_params = {
                 "access_token": META_ACCESS_TOKEN,
-                "fields": "id,name,targeting",
-                "filtering": json.dumps([{
+                "fields": _ADSET_FIELDS_TARGETING,
+                "filtering": _dumps([{
                     "field": "id",
                     "operator": "IN",
-                    "value": adset_ids[:20]  # 最多 20 個
+                    "value": adset_ids
                 }]),
-                "limit": 20
+                "limit": len(adset_ids)
             }
-            targeting_resp = requests.get(adsets_url, params=targeting_params).json()
+            targeting_resp = _meta_get(adsets_url, targeting_params)
             
             if "data" in targeting_resp:
                 for item in targeting_resp["data"]:
@@ -458,66 +700,56 @@ def get_meta_adset_data(start_date, end_date):
             print(f"⚠️  Error fetching adset targeting: {e}")
     
     # [NEW] 取得每個 adset 的年齡和性別分布
-    for adset in adsets:
-        adset_id = adset.get("adset_id")
-        if adset_id:
-            age_gender_data = get_adset_age_gender_breakdown(adset_id, start_date, end_date)
-            if age_gender_data:
-                adset["age_distribution"] = age_gender_data.get("age", [])
-                adset["gender_distribution"] = age_gender_data.get("gender", [])
-    
-    return adsets[:10]  # Top 10 adsets
+    top_adsets = [adset for adset in adsets if adset.get("adset_id")]
+    if top_adsets:
+        distributions = get_adset_age_gender_distributions(
+            [adset["adset_id"] for adset in top_adsets], start_date, end_date
+        )
+        for adset in top_adsets:
+            dist = distributions.get(adset["adset_id"])
+            if dist:
+                adset["age_distribution"] = [
+                    {"age_range": age, "spend": spend} for age, spend in dist["age"].items()
+                ]
+                adset["gender_distribution"] = [
+                    {"gender": gender, "spend": spend} for gender, spend in dist["gender"].items()
+                ]
+    
+    return adsets  # Top 10 adsets
 
 
-def get_adset_age_gender_breakdown(adset_id, start_date, end_date):
+def get_adset_age_gender_distributions(adset_ids, start_date, end_date):
     """
-    [NEW] 取得單一廣告組的年齡和性別花費分布
+    一次 account 層級 insights（level=adset, breakdowns=age,gender）取得多個廣告組的花費分布
+    回傳 {adset_id: {"age": {age_range: spend}, "gender": {gender: spend}}}
     """
-    base_url = f"https://graph.facebook.com/v21.0/{adset_id}/insights"
-    time_range = json.dumps({"since": start_date, "until": end_date})
-    
-    result = {
-        "age": [],
-        "gender": []
+    base_url = f"{GRAPH_API_URL}/{META_AD_ACCOUNT_ID}/insights"
+    params = {
+        "access_token": META_ACCESS_TOKEN,
+        "time_range": _time_range(start_date, end_date),
+        "fields": _INSIGHT_FIELDS_ADSET_DIST,
+        "level": "adset",
+        "breakdowns": "age,gender",
+        "filtering": _dumps([{"field": "adset.id", "operator": "IN", "value": adset_ids}]),
+        "limit": 500
     }
     
-    # 1. Age breakdown
+    by_id = defaultdict(lambda: {"age": defaultdict(float), "gender": defaultdict(float)})
     try:
-        age_params = {
-            "access_token": META_ACCESS_TOKEN,
-            "time_range": time_range,
-            "fields": "spend",
-            "breakdowns": "age"
-        }
-        age_resp = requests.get(base_url, params=age_params).json()
-        if "data" in age_resp:
-            for item in age_resp["data"]:
-                result["age"].append({
-                    "age_range": item.get("age", "Unknown"),
-                    "spend": float(item.get("spend", 0))
-                })
-    except Exception as e:
-        print(f"  ⚠️ Error fetching age breakdown for {adset_id}: {e}")
-    
-    # 2. Gender breakdown
-    try:
-        gender_params = {
-            "access_token": META_ACCESS_TOKEN,
-            "time_range": time_range,
-            "fields": "spend",
-            "breakdowns": "gender"
-        }
-        gender_resp = requests.get(base_url, params=gender_params).json()
-        if "data" in gender_resp:
-            for item in gender_resp["data"]:
-                result["gender"].append({
-                    "gender": item.get("gender", "Unknown"),
-                    "spend": float(item.get("spend", 0))
-                })
+        resp = _meta_get(base_url, params)
+        while True:
+            for item in resp.get("data", []):
+                spend = float(item.get("spend", 0))
+                dist = by_id[item.get("adset_id")]
+                dist["age"][item.get("age", "Unknown")] += spend
+                dist["gender"][item.get("gender", "Unknown")] += spend
+            next_url = resp.get("paging", {}).get("next")
+            if not next_url:
+                break
+            resp = _meta_get(next_url)
     except Exception as e:
-        print(f"  ⚠️ Error fetching gender breakdown for {adset_id}: {e}")
-    
-    return result
+        print(f"  ⚠️ Error fetching adset age/gender breakdown: {e}")
+    return by_id
 
 
 def get_meta_ad_creatives(start_date, end_date, backup_images=True):
@@ -535,11 +767,9 @@ def get_meta_ad_creatives(start_date, end_date, backup_images=True):
     再抓取對應的 creative，確保只包含報告期間實際運行的廣告。
     """
     # Step 0: 先用 insights API 取得在日期範圍內有花費的廣告 ID 和完整成效數據
-    insights_url = f"https://graph.facebook.com/v21.0/{META_AD_ACCOUNT_ID}/insights"
     insights_params = {
-        "access_token": META_ACCESS_TOKEN,
-        "time_range": json.dumps({"since": start_date, "until": end_date}),
-        "fields": "ad_id,ad_name,spend,impressions,clicks,ctr,cpm,purchase_roas,actions,action_values",
+        "time_range": _time_range(start_date, end_date),
+        "fields": _INSIGHT_FIELDS_AD,
         "level": "ad",
         "limit": 100
     }
@@ -548,7 +778,7 @@ def get_meta_ad_creatives(start_date, end_date, backup_images=True):
     ad_id_to_name = {}  # 用於後續比對
     ad_id_to_metrics = {}  # [NEW] 儲存每個廣告的成效數據
     try:
-        insights_resp = requests.get(insights_url, params=insights_params).json()
+        insights_resp = _get_insights(insights_params, start_date, end_date)
         if "data" in insights_resp:
             for item in insights_resp["data"]:
                 spend = float(item.get("spend", 0))
@@ -558,26 +788,10 @@ def get_meta_ad_creatives(start_date, end_date, backup_images=True):
                     ad_id_to_name[ad_id] = item.get("ad_name", "Unknown")
                     
                     # [NEW] 解析成效數據
-                    roas = 0.0
-                    if "purchase_roas" in item:
-                        for r in item["purchase_roas"]:
-                            if r.get("action_type") == "omni_purchase":
-                                roas = float(r["value"])
-                    
-                    purchases = 0
-                    atc = 0
-                    if "actions" in item:
-                        for action in item["actions"]:
-                            if action.get("action_type") == "omni_purchase":
-                                purchases = int(action["value"])
-                            elif action.get("action_type") == "omni_add_to_cart":
-                                atc = int(action["value"])
-                    
-                    conv_value = 0.0
-                    if "action_values" in item:
-                        for av in item["action_values"]:
-                            if av.get("action_type") == "omni_purchase":
-                                conv_value = float(av["value"])
+                    roas = _omni_purchase_value(item.get("purchase_roas"))
+                    actions = _extract_actions(item.get("actions"))
+                    purchases, atc = actions["purchases"], actions["atc"]
+                    conv_value = _omni_purchase_value(item.get("action_values"))
                     
                     ad_id_to_metrics[ad_id] = {
                         "spend": spend,
@@ -589,7 +803,7 @@ def get_meta_ad_creatives(start_date, end_date, backup_images=True):
                         "purchases": purchases,
                         "atc": atc,
                         "conv_value": conv_value,
-                        "cpa": spend / purchases if purchases > 0 else 0
+                        "cpa": _cost_per(spend, purchases)
                     }
         print(f"📊 Found {len(ad_ids_with_spend)} ads with spend in {start_date} ~ {end_date}")
     except Exception as e:
@@ -602,17 +816,29 @@ def get_meta_ad_creatives(start_date, end_date, backup_images=True):
     
     # Step 1: 只抓取有花費的廣告的 creative - 使用 filtering by ad_id
     # [2026-02-13] 加入影片欄位：video_id 用於影片素材
-    ads_url = f"https://graph.facebook.com/v21.0/{META_AD_ACCOUNT_ID}/ads"
-    ads_params = {
-        "access_token": META_ACCESS_TOKEN,
-        "fields": "id,name,creative{id,title,body,object_story_spec,effective_object_story_id,image_url,thumbnail_url,asset_feed_spec,video_id}",
-        "filtering": json.dumps([{"field": "id", "operator": "IN", "value": ad_ids_with_spend[:50]}]),
-        "limit": 50
-    }
+    # 每 50 個 ad_id 一組，各組同時查詢（不再只取前 50 個）
+    ads_url = f"{GRAPH_API_URL}/{META_AD_ACCOUNT_ID}/ads"
+    
+    def fetch_ads(ad_ids):
+        return _meta_get_all(ads_url, {
+            "access_token": META_ACCESS_TOKEN,
+            "fields": _AD_FIELDS_CREATIVE,
+            "filtering": _dumps([{"field": "id", "operator": "IN", "value": ad_ids}]),
+            "limit": 50
+        })
     
     creatives = []
     try:
-        ads_resp = requests.get(ads_url, params=ads_params).json()
+        id_chunks = [ad_ids_with_spend[i:i+50] for i in range(0, len(ad_ids_with_spend), 50)]
+        with ThreadPoolExecutor(max_workers=META_MAX_WORKERS) as executor:
+            ads_resp = {"data": []}
+            chunk_errors = []
+            for chunk_resp in executor.map(fetch_ads, id_chunks):
+                if "error" in chunk_resp:
+                    chunk_errors.append(chunk_resp["error"])
+                ads_resp["data"].extend(chunk_resp.get("data", []))
+        if chunk_errors:
+            print(f"⚠️  {len(chunk_errors)}/{len(id_chunks)} ads chunks failed, first error: {chunk_errors[0]}")
         if "data" in ads_resp:
             for ad in ads_resp["data"]:
                 creative_data = ad.get("creative", {})
@@ -626,7 +852,6 @@ def get_meta_ad_creatives(start_date, end_date, backup_images=True):
                 
                 # 取得輪播圖片列表（優先用 image_hash）
                 carousel_images = []
-                image_hashes = []  # 收集所有需要解析的 hash
                 object_story = creative_data.get("object_story_spec", {})
                 if object_story:
                     link_data = object_story.get("link_data", {})
@@ -637,20 +862,17 @@ def get_meta_ad_creatives(start_date, end_date, backup_images=True):
                             title = link_data.get("name", "") or link_data.get("title", "")
                         
                         # 輪播廣告的圖片在 child_attachments 裡
-                        child_attachments = link_data.get("child_attachments", [])
-                        for i, child in enumerate(child_attachments):
-                            image_hash = child.get("image_hash")
-                            child_image = child.get("picture") or child.get("image_url")
-                            carousel_images.append({
+                        carousel_images = [
+                            {
                                 "index": i,
-                                "image_hash": image_hash,  # 保存 hash 用於後續解析
-                                "image_url": child_image,  # 可能是臨時 URL 或空
+                                "image_hash": child.get("image_hash"),  # 保存 hash 用於後續解析
+                                "image_url": child.get("picture") or child.get("image_url"),  # 可能是臨時 URL 或空
                                 "name": child.get("name", ""),
                                 "description": child.get("description", ""),
                                 "link": child.get("link", "")
-                            })
-                            if image_hash:
-                                image_hashes.append(image_hash)
+                            }
+                            for i, child in enumerate(link_data.get("child_attachments", []))
+                        ]
                 
                 # 如果沒有輪播圖片，用主圖片
                 if not carousel_images and main_image_url:
@@ -672,7 +894,6 @@ def get_meta_ad_creatives(start_date, end_date, backup_images=True):
                 # 如果有 video_id，標記為影片素材
                 if video_id:
                     is_video = True
-                    print(f"  📹 Found video creative: {ad.get('name', 'Unknown')[:40]}... (video_id: {video_id})")
                 
                 # [NEW] 取得該廣告的成效數據
                 ad_id = ad.get("id")
@@ -709,6 +930,8 @@ def get_meta_ad_creatives(start_date, end_date, backup_images=True):
                     "conv_value": metrics.get("conv_value", 0),
                     "cpa": metrics.get("cpa", 0)
                 })
+        video_count = sum(1 for c in creatives if c["is_video"])
+        print(f"📋 Fetched {len(creatives)} ad creatives ({video_count} video)")
     except Exception as e:
         print(f"Error fetching ad creatives: {e}")
     
@@ -725,19 +948,21 @@ def get_meta_ad_creatives(start_date, end_date, backup_images=True):
             # 批次取得所有 hash 對應的 URL
             hash_to_url = {}
             hash_list = list(all_hashes)
-            # 每次最多查詢 50 個 hash
-            for i in range(0, len(hash_list), 50):
-                batch = hash_list[i:i+50]
-                images_url = f"https://graph.facebook.com/v21.0/{META_AD_ACCOUNT_ID}/adimages"
-                images_params = {
-                    "access_token": META_ACCESS_TOKEN,
-                    "hashes": json.dumps(batch),
-                    "fields": "hash,url"
-                }
-                images_resp = requests.get(images_url, params=images_params).json()
-                if "data" in images_resp:
-                    for img_data in images_resp["data"]:
-                        hash_to_url[img_data["hash"]] = img_data.get("url")
+            
+            # 每個子請求查 50 個 hash，整包用一次 batch request 送出（每包最多 50 個子請求）
+            relative_urls = [
+                f"{META_AD_ACCOUNT_ID}/adimages?" + urlencode({
+                    "hashes": _dumps(hash_list[i:i+50]),
+                    "fields": "hash,url",
+                    "limit": 50
+                })
+                for i in range(0, len(hash_list), 50)
+            ]
+            for i in range(0, len(relative_urls), 50):
+                for images_resp in _meta_batch(relative_urls[i:i+50]):
+                    if "data" in images_resp:
+                        for img_data in images_resp["data"]:
+                            hash_to_url[img_data["hash"]] = img_data.get("url")
             
             # 更新 creatives 的圖片 URL
             for creative in creatives:
@@ -778,6 +1003,41 @@ def get_meta_ad_creatives(start_date, end_date, backup_images=True):
     return creatives
 
 
+def get_all_meta_data(start_date, end_date):
+    """
+    同時抓取互不相依的 Meta 資料（總覽、受眾、素材、效率指標、廣告組）
+    各自在 thread 中執行並共用 META_SESSION 連線池，總耗時約等於最慢的一項
+    """
+    fetchers = {
+        "meta": get_meta_data,
+        "meta_audience": get_meta_audience_breakdown,
+        "ad_creatives": get_meta_ad_creatives,
+        "meta_efficiency": get_meta_efficiency_metrics,
+        "meta_adsets": get_meta_adset_data,
+    }
+    with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
+        futures = {key: executor.submit(fetch, start_date, end_date) for key, fetch in fetchers.items()}
+        return {key: future.result() for key, future in futures.items()}
+
+
+def build_adset_name_matcher(adset_metrics):
+    """
+    建立 ad_name → adset 的比對函式：回傳第一個與 ad_name 互相包含的 adset（依 adset_metrics 順序）
+    同名廣告（同一素材投多個廣告組合）只比對一次
+    """
+    memo = {}
+    
+    def match(ad_name):
+        if ad_name not in memo:
+            memo[ad_name] = next(
+                (metrics for name, metrics in adset_metrics.items() if ad_name in name or name in ad_name),
+                None,
+            )
+        return memo[ad_name]
+    
+    return match
+
+
 def extract_ad_copies(ad_creatives):
     """
     [NEW] 從 ad_creatives 中提取文案數據
@@ -825,32 +1085,55 @@ def extract_ad_copies(ad_creatives):
             "conv_value": creative.get("conv_value", 0)
         })
     
-    # 按花費排序
-    ad_copies.sort(key=lambda x: x["spend"], reverse=True)
+    # 按花費排序（全部文案都會上傳 Supabase，所以完整排序而非只取 Top N）
+    ad_copies.sort(key=itemgetter("spend"), reverse=True)
     
     return ad_copies
 
 
-def get_ga4_data(start_date, end_date):
+_GA4_CLIENT_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _build_ga4_client():
+    from google.analytics.data_v1beta import BetaAnalyticsDataClient
     os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = GA4_KEY_PATH
-    client = BetaAnalyticsDataClient()
-    
-    # 1. Overall Funnel - [ENHANCED] 確保有完整漏斗數據
-    request = RunReportRequest(
+    return BetaAnalyticsDataClient()
+
+
+def _ga4_client():
+    """
+    共用同一個 GA4 client（gRPC channel 可跨 thread 共用）
+    加鎖確保多個 GA4 查詢同時開始時只建立一次
+    """
+    with _GA4_CLIENT_LOCK:
+        return _build_ga4_client()
+
+
+def _ga4_request(start_date, end_date, metrics, dimensions=()):
+    from google.analytics.data_v1beta.types import DateRange, Dimension, Metric, RunReportRequest
+    return RunReportRequest(
         property=f"properties/{GA4_PROPERTY_ID}",
-        dimensions=[],
-        metrics=[
-            Metric(name="activeUsers"), 
-            Metric(name="sessions"),
-            Metric(name="addToCarts"),
-            Metric(name="checkouts"),
-            Metric(name="transactions"),
-            Metric(name="ecommercePurchases"),  # [NEW] 購買次數
-            Metric(name="purchaseRevenue"),      # [NEW] 購買營收
-        ],
+        dimensions=[Dimension(name=name) for name in dimensions],
+        metrics=[Metric(name=name) for name in metrics],
         date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
     )
-    response = client.run_report(request)
+
+
+# 1. Overall Funnel - [ENHANCED] 確保有完整漏斗數據
+def _ga4_totals_request(start_date, end_date):
+    return _ga4_request(start_date, end_date, [
+        "activeUsers",
+        "sessions",
+        "addToCarts",
+        "checkouts",
+        "transactions",
+        "ecommercePurchases",  # [NEW] 購買次數
+        "purchaseRevenue",     # [NEW] 購買營收
+    ])
+
+
+def _parse_ga4_totals(response):
     total_data = {
         "active_users": 0, 
         "sessions": 0, 
@@ -862,42 +1145,41 @@ def get_ga4_data(start_date, end_date):
     }
     if response.rows:
         row = response.rows[0]
+        values = [v.value for v in row.metric_values]
         total_data = {
-            "active_users": int(row.metric_values[0].value),
-            "sessions": int(row.metric_values[1].value),
-            "atc": int(row.metric_values[2].value),
-            "ic": int(row.metric_values[3].value),
-            "purchases": int(row.metric_values[4].value),
-            "ecommerce_purchases": int(row.metric_values[5].value),
-            "purchase_revenue": float(row.metric_values[6].value)
+            "active_users": int(values[0]),
+            "sessions": int(values[1]),
+            "atc": int(values[2]),
+            "ic": int(values[3]),
+            "purchases": int(values[4]),
+            "ecommerce_purchases": int(values[5]),
+            "purchase_revenue": float(values[6])
         }
     
     # [NEW] 計算各階段轉換率
     funnel_rates = calculate_funnel_rates(total_data)
     total_data["funnel_rates"] = funnel_rates
+    return total_data
 
-    # 2. Source Breakdown
-    breakdown_req = RunReportRequest(
-        property=f"properties/{GA4_PROPERTY_ID}",
-        dimensions=[Dimension(name="sessionSourceMedium")],
-        metrics=[
-            Metric(name="sessions"),
-            Metric(name="addToCarts"),
-            Metric(name="checkouts"),
-            Metric(name="transactions")
-        ],
-        date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
-    )
-    bd_response = client.run_report(breakdown_req)
+
+# 2. Source Breakdown
+def _ga4_channels_request(start_date, end_date):
+    return _ga4_request(start_date, end_date,
+                        ["sessions", "addToCarts", "checkouts", "transactions"],
+                        dimensions=["sessionSourceMedium"])
+
+
+def _parse_ga4_channels(response):
     channels = []
-    if bd_response.rows:
-        for row in bd_response.rows:
+    if response.rows:
+        for row in response.rows:
+            values = [v.value for v in row.metric_values]
             source = row.dimension_values[0].value
-            sessions = int(row.metric_values[0].value)
+            sessions = int(values[0])
             if sessions > 0:
-                atc = int(row.metric_values[1].value)
-                ic = int(row.metric_values[2].value)
-                purchases = int(row.metric_values[3].value)
+                atc = int(values[1])
+                ic = int(values[2])
+                purchases = int(values[3])
                 channels.append({
                     "source": source,
                     "sessions": sessions,
@@ -905,63 +1187,94 @@ def get_ga4_data(start_date, end_date):
                     "ic": ic,
                     "purchases": purchases,
                     # [NEW] 每個渠道的轉換率
-                    "session_to_atc_rate": round(atc / sessions * 100, 2) if sessions > 0 else 0,
-                    "atc_to_purchase_rate": round(purchases / atc * 100, 2) if atc > 0 else 0
+                    "session_to_atc_rate": _pct(atc, sessions),
+                    "atc_to_purchase_rate": _pct(purchases, atc)
                 })
     
     # Return all channels (no limit) - frontend will handle display
     # Sort by purchases first, then sessions to ensure sources with purchases are included
+    return sorted(channels, key=itemgetter("purchases", "sessions"), reverse=True)
+
+
+@_cached_by_period()
+def get_ga4_data(start_date, end_date):
+    client = _ga4_client()
+    response = client.run_report(_ga4_totals_request(start_date, end_date))
+    bd_response = client.run_report(_ga4_channels_request(start_date, end_date))
     return {
-        "total": total_data,
-        "channels": sorted(channels, key=lambda x: (x["purchases"], x["sessions"]), reverse=True)
+        "total": _parse_ga4_totals(response),
+        "channels": _parse_ga4_channels(bd_response)
     }
 
 
+def _ga4_devices_request(start_date, end_date):
+    return _ga4_request(start_date, end_date,
+                        ["sessions", "activeUsers", "transactions", "purchaseRevenue"],
+                        dimensions=["deviceCategory"])
+
+
+def _parse_ga4_devices(response):
+    devices = []
+    total_sessions = 0
+    
+    for row in response.rows:
+        values = [v.value for v in row.metric_values]
+        sessions = int(values[0])
+        total_sessions += sessions
+        devices.append({
+            "device": row.dimension_values[0].value,
+            "sessions": sessions,
+            "users": int(values[1]),
+            "transactions": int(values[2]),
+            "revenue": float(values[3])
+        })
+    
+    # Calculate percentages
+    for d in devices:
+        d["session_pct"] = round(d["sessions"] / total_sessions * 100, 1) if total_sessions > 0 else 0
+        d["conv_rate"] = round(d["transactions"] / d["sessions"] * 100, 2) if d["sessions"] > 0 else 0
+    return devices
+
+
 def get_ga4_device_data(start_date, end_date):
     """
     [NEW] 取得 GA4 裝置分布數據
     了解用戶使用 mobile/desktop/tablet 的比例
     """
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = GA4_KEY_PATH
-    client = BetaAnalyticsDataClient()
-    
-    request = RunReportRequest(
-        property=f"properties/{GA4_PROPERTY_ID}",
-        dimensions=[Dimension(name="deviceCategory")],
-        metrics=[
-            Metric(name="sessions"),
-            Metric(name="activeUsers"),
-            Metric(name="transactions"),
-            Metric(name="purchaseRevenue")
-        ],
-        date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
-    )
-    
-    devices = []
     try:
-        response = client.run_report(request)
-        total_sessions = 0
-        
-        for row in response.rows:
-            sessions = int(row.metric_values[0].value)
-            total_sessions += sessions
-            devices.append({
-                "device": row.dimension_values[0].value,
-                "sessions": sessions,
-                "users": int(row.metric_values[1].value),
-                "transactions": int(row.metric_values[2].value),
-                "revenue": float(row.metric_values[3].value)
-            })
-        
-        # Calculate percentages
-        for d in devices:
-            d["session_pct"] = round(d["sessions"] / total_sessions * 100, 1) if total_sessions > 0 else 0
-            d["conv_rate"] = round(d["transactions"] / d["sessions"] * 100, 2) if d["sessions"] > 0 else 0
-            
+        return _parse_ga4_devices(_ga4_client().run_report(_ga4_devices_request(start_date, end_date)))
     except Exception as e:
         print(f"Error fetching device data: {e}")
+        return []
+
+
+def _ga4_user_type_request(start_date, end_date):
+    return _ga4_request(start_date, end_date,
+                        ["sessions", "activeUsers", "transactions", "purchaseRevenue"],
+                        dimensions=["newVsReturning"])
+
+
+def _parse_ga4_user_type(response):
+    user_types = {}
+    total_sessions = 0
+    
+    for row in response.rows:
+        values = [v.value for v in row.metric_values]
+        user_type = row.dimension_values[0].value  # "new" or "returning"
+        sessions = int(values[0])
+        total_sessions += sessions
+        user_types[user_type] = {
+            "sessions": sessions,
+            "users": int(values[1]),
+            "transactions": int(values[2]),
+            "revenue": float(values[3])
+        }
     
-    return devices
+    # Calculate percentages and conversion rates
+    for k, v in user_types.items():
+        v["session_pct"] = round(v["sessions"] / total_sessions * 100, 1) if total_sessions > 0 else 0
+        v["conv_rate"] = round(v["transactions"] / v["sessions"] * 100, 2) if v["sessions"] > 0 else 0
+    return user_types
 
 
 def get_ga4_user_type(start_date, end_date):
@@ -969,46 +1282,44 @@ def get_ga4_user_type(start_date, end_date):
     [NEW] 取得 GA4 新/回訪用戶比例
     判斷流量品質和品牌認知
     """
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = GA4_KEY_PATH
-    client = BetaAnalyticsDataClient()
-    
-    request = RunReportRequest(
-        property=f"properties/{GA4_PROPERTY_ID}",
-        dimensions=[Dimension(name="newVsReturning")],
-        metrics=[
-            Metric(name="sessions"),
-            Metric(name="activeUsers"),
-            Metric(name="transactions"),
-            Metric(name="purchaseRevenue")
-        ],
-        date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
-    )
-    
-    user_types = {}
     try:
-        response = client.run_report(request)
-        total_sessions = 0
-        
-        for row in response.rows:
-            user_type = row.dimension_values[0].value  # "new" or "returning"
-            sessions = int(row.metric_values[0].value)
-            total_sessions += sessions
-            user_types[user_type] = {
-                "sessions": sessions,
-                "users": int(row.metric_values[1].value),
-                "transactions": int(row.metric_values[2].value),
-                "revenue": float(row.metric_values[3].value)
-            }
-        
-        # Calculate percentages and conversion rates
-        for k, v in user_types.items():
-            v["session_pct"] = round(v["sessions"] / total_sessions * 100, 1) if total_sessions > 0 else 0
-            v["conv_rate"] = round(v["transactions"] / v["sessions"] * 100, 2) if v["sessions"] > 0 else 0
-            
+        return _parse_ga4_user_type(_ga4_client().run_report(_ga4_user_type_request(start_date, end_date)))
     except Exception as e:
         print(f"Error fetching user type data: {e}")
-    
-    return user_types
+        return {}
+
+
+_EMPTY_ENGAGEMENT = {
+    "engagement_rate": 0, "avg_session_duration_sec": 0,
+    "avg_session_duration_formatted": "0:00",
+    "page_views": 0, "pages_per_session": 0, "bounce_rate": 0
+}
+
+
+def _ga4_engagement_request(start_date, end_date):
+    return _ga4_request(start_date, end_date, [
+        "engagementRate",
+        "averageSessionDuration",
+        "screenPageViews",
+        "screenPageViewsPerSession",
+        "bounceRate",
+    ])
+
+
+def _parse_ga4_engagement(response):
+    if not response.rows:
+        return {}
+    row = response.rows[0]
+    values = [v.value for v in row.metric_values]
+    duration = float(values[1])
+    return {
+        "engagement_rate": round(float(values[0]) * 100, 2),
+        "avg_session_duration_sec": duration,
+        "avg_session_duration_formatted": format_duration(duration),
+        "page_views": int(float(values[2])),
+        "pages_per_session": round(float(values[3]), 2),
+        "bounce_rate": round(float(values[4]) * 100, 2)
+    }
 
 
 def get_ga4_engagement(start_date, end_date):
@@ -1016,44 +1327,49 @@ def get_ga4_engagement(start_date, end_date):
     [NEW] 取得 GA4 互動指標
     包含互動率、平均工作階段時長、頁面瀏覽量
     """
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = GA4_KEY_PATH
-    client = BetaAnalyticsDataClient()
-    
-    request = RunReportRequest(
-        property=f"properties/{GA4_PROPERTY_ID}",
-        dimensions=[],
-        metrics=[
-            Metric(name="engagementRate"),
-            Metric(name="averageSessionDuration"),
-            Metric(name="screenPageViews"),
-            Metric(name="screenPageViewsPerSession"),
-            Metric(name="bounceRate")
-        ],
-        date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
-    )
-    
-    engagement = {}
     try:
-        response = client.run_report(request)
-        if response.rows:
-            row = response.rows[0]
-            engagement = {
-                "engagement_rate": round(float(row.metric_values[0].value) * 100, 2),
-                "avg_session_duration_sec": float(row.metric_values[1].value),
-                "avg_session_duration_formatted": format_duration(float(row.metric_values[1].value)),
-                "page_views": int(float(row.metric_values[2].value)),
-                "pages_per_session": round(float(row.metric_values[3].value), 2),
-                "bounce_rate": round(float(row.metric_values[4].value) * 100, 2)
-            }
+        return _parse_ga4_engagement(_ga4_client().run_report(_ga4_engagement_request(start_date, end_date)))
     except Exception as e:
         print(f"Error fetching engagement data: {e}")
-        engagement = {
-            "engagement_rate": 0, "avg_session_duration_sec": 0,
-            "avg_session_duration_formatted": "0:00",
-            "page_views": 0, "pages_per_session": 0, "bounce_rate": 0
+        return dict(_EMPTY_ENGAGEMENT)
+
+
+def get_all_ga4_data(start_date, end_date):
+    """
+    用一次 batchRunReports（上限 5 個報表）取得總覽、渠道、裝置、新舊用戶、互動指標
+    batch 失敗時退回逐一查詢（各函式原本的錯誤處理不變）
+    """
+    try:
+        from google.analytics.data_v1beta.types import BatchRunReportsRequest
+        batch = _ga4_client().batch_run_reports(BatchRunReportsRequest(
+            property=f"properties/{GA4_PROPERTY_ID}",
+            requests=[
+                _ga4_totals_request(start_date, end_date),
+                _ga4_channels_request(start_date, end_date),
+                _ga4_devices_request(start_date, end_date),
+                _ga4_user_type_request(start_date, end_date),
+                _ga4_engagement_request(start_date, end_date),
+            ],
+        ))
+        totals, channels, devices, user_types, engagement = batch.reports
+    except Exception as e:
+        print(f"⚠️  GA4 batch request failed, falling back to individual reports: {e}")
+        return {
+            "ga4": get_ga4_data(start_date, end_date),
+            "ga4_devices": get_ga4_device_data(start_date, end_date),
+            "ga4_user_types": get_ga4_user_type(start_date, end_date),
+            "ga4_engagement": get_ga4_engagement(start_date, end_date),
         }
     
-    return engagement
+    ga4 = {"total": _parse_ga4_totals(totals), "channels": _parse_ga4_channels(channels)}
+    # 與 get_ga4_data 共用區間快取，明天的 DoD 比較可直接命中
+    _store_period_result("get_ga4_data", start_date, end_date, ga4)
+    return {
+        "ga4": ga4,
+        "ga4_devices": _parse_ga4_devices(devices),
+        "ga4_user_types": _parse_ga4_user_type(user_types),
+        "ga4_engagement": _parse_ga4_engagement(engagement),
+    }
 
 
 def format_duration(seconds):
@@ -1078,10 +1394,11 @@ def fetch_page_title(url, timeout=5):
         return _page_title_cache[url]
     
     try:
-        response = requests.get(url, timeout=timeout, headers={
+        response = SESSION.get(url, timeout=timeout, headers={
             'User-Agent': 'Mozilla/5.0 (compatible; CarMall Dashboard)'
         })
         if response.status_code == 200:
+            from bs4 import BeautifulSoup
             soup = BeautifulSoup(response.text, 'html.parser')
             title_tag = soup.find('title')
             if title_tag:
@@ -1095,6 +1412,26 @@ def fetch_page_title(url, timeout=5):
     return None
 
 
+# 每個 thread 各自快取一個 GSC service（googleapiclient 底層的 httplib2 不是 thread-safe）
+_gsc_local = threading.local()
+
+def _gsc_service(key_path):
+    """
+    取得快取的 GSC service，避免每次重讀金鑰檔、重新簽發 token 與重建 discovery
+    """
+    if getattr(_gsc_local, "key_path", None) != key_path:
+        from googleapiclient.discovery import build
+        from google.oauth2 import service_account
+        
+        credentials = service_account.Credentials.from_service_account_file(
+            key_path,
+            scopes=['https://www.googleapis.com/auth/webmasters.readonly']
+        )
+        _gsc_local.service = build('searchconsole', 'v1', credentials=credentials, cache_discovery=False)
+        _gsc_local.key_path = key_path
+    return _gsc_local.service
+
+
 def get_gsc_data(start_date, end_date):
     """
     [NEW] 取得 Google Search Console 數據
@@ -1109,14 +1446,7 @@ def get_gsc_data(start_date, end_date):
         return None
     
     try:
-        from googleapiclient.discovery import build
-        from google.oauth2 import service_account
-        
-        credentials = service_account.Credentials.from_service_account_file(
-            gsc_key_path,
-            scopes=['https://www.googleapis.com/auth/webmasters.readonly']
-        )
-        service = build('searchconsole', 'v1', credentials=credentials)
+        service = _gsc_service(gsc_key_path)
         
         gsc_data = {
             "total": {},
@@ -1176,13 +1506,16 @@ def get_gsc_data(start_date, end_date):
         ).execute()
         
         if "rows" in page_response:
+            # 先同時爬取所有頁面標題（使用本地 fetch_page_title 函數）
+            page_urls = [row["keys"][0] for row in page_response["rows"]]
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                titles = dict(zip(page_urls, executor.map(fetch_page_title, page_urls)))
+            
             for row in page_response["rows"]:
                 # 簡化 URL 顯示
                 page_url = row["keys"][0]
                 page_path = page_url.replace(gsc_site_url, "") or "/"
-                
-                # 爬取頁面標題（使用本地 fetch_page_title 函數）
-                page_title = fetch_page_title(page_url)
+                page_title = titles[page_url]
                 
                 gsc_data["top_pages"].append({
                     "page": page_path,
@@ -1204,6 +1537,16 @@ def get_gsc_data(start_date, end_date):
         return None
 
 
+def _pct(n, d):
+    """n / d 的百分比（兩位小數）；分母為 0 時為 0"""
+    return round(n / d * 100, 2) if d > 0 else 0
+
+
+def _drop_pct(n, d):
+    """從 d 到 n 的流失百分比（兩位小數）；分母為 0 時為 0"""
+    return round((1 - n / d) * 100, 2) if d > 0 else 0
+
+
 def calculate_funnel_rates(data):
     """
     [NEW] 計算 GA4 漏斗各階段轉換率
@@ -1215,63 +1558,128 @@ def calculate_funnel_rates(data):
     purchases = data.get("purchases", 0)
     
     return {
-        "session_to_atc": round(atc / sessions * 100, 2) if sessions > 0 else 0,
-        "atc_to_checkout": round(ic / atc * 100, 2) if atc > 0 else 0,
-        "checkout_to_purchase": round(purchases / ic * 100, 2) if ic > 0 else 0,
-        "overall_conversion": round(purchases / sessions * 100, 2) if sessions > 0 else 0,
+        "session_to_atc": _pct(atc, sessions),
+        "atc_to_checkout": _pct(ic, atc),
+        "checkout_to_purchase": _pct(purchases, ic),
+        "overall_conversion": _pct(purchases, sessions),
         # [NEW] 各階段流失率
-        "atc_drop_off": round((1 - atc / sessions) * 100, 2) if sessions > 0 else 0,
-        "checkout_drop_off": round((1 - ic / atc) * 100, 2) if atc > 0 else 0,
-        "purchase_drop_off": round((1 - purchases / ic) * 100, 2) if ic > 0 else 0
+        "atc_drop_off": _drop_pct(atc, sessions),
+        "checkout_drop_off": _drop_pct(ic, atc),
+        "purchase_drop_off": _drop_pct(purchases, ic)
     }
 
 
-def get_cyberbiz_data(start_date, end_date):
+CYBERBIZ_API_URL = "https://app-store-api.cyberbiz.io/v1"
+CYBERBIZ_PAGE_SIZE = 50
+# 每輪同時預抓的頁數
+CYBERBIZ_PREFETCH_PAGES = 8
+# 全程序同時進行中的 Cyberbiz 請求上限（多個區間 / 多天平行抓取時共用，不超過 SESSION 連線池）
+CYBERBIZ_MAX_IN_FLIGHT = 8
+_CYBERBIZ_SLOTS = threading.BoundedSemaphore(CYBERBIZ_MAX_IN_FLIGHT)
+
+
+class CyberbizFetchError(RuntimeError):
+    """Cyberbiz 分頁抓取中途失敗：資料不完整，不能當成完整結果使用"""
+
+
+def _cyberbiz_error_result(error):
     """
-    注意：Cyberbiz orders API 不支援日期篩選，需要分頁抓取後本地篩選
+    Cyberbiz 抓取失敗時放進報表的標記：數值欄位為 None（上傳後為 null，不會被當成 0 訂單 / 0 營收）
+    列表欄位維持空列表，讓下游照常處理
     """
-    url = "https://app-store-api.cyberbiz.io/v1/orders"
+    return {
+        "error": str(error),
+        "order_count": None,
+        "total_revenue": None,
+        "aov": None,
+        "daily_aov": [],
+        "product_ranking": [],
+        "new_members": None,
+    }
+
+
+def _page_older_than(items, start_date):
+    """
+    這一頁是否已經翻過 start_date：資料依 created_at 由新到舊排列，且最後一筆早於 start_date
+    （排序不如預期時回傳 False，繼續往下翻頁）
+    """
+    dates = [(item.get("created_at") or "")[:10] for item in items]
+    return dates[-1] < start_date and all(a >= b for a, b in zip(dates, dates[1:]))
+
+
+def _fetch_cyberbiz_pages(resource, max_pages, start_date=None, end_date=None):
+    """
+    Cyberbiz 分頁抓取（API 只支援 page/limit）：每輪同時預抓 CYBERBIZ_PREFETCH_PAGES 頁，依頁序合併
+    遇到空頁或不滿一頁即停止，之後多抓的頁面捨棄
+    某頁在重試後仍非 200 或發生例外時拋出 CyberbizFetchError（不回傳截斷的資料）
+    有 start_date/end_date 時只保留 created_at 落在區間內的資料，
+    且翻到早於 start_date 的頁面就停止（後面的頁面只會更舊）
+    """
+    url = f"{CYBERBIZ_API_URL}/{resource}"
     headers = {
         "Authorization": f"Bearer {CYBERBIZ_TOKEN}",
         "Accept": "application/json"
     }
     
-    # 分頁抓取所有訂單
-    all_orders = []
-    page = 1
-    while page <= 50:  # 最多 50 頁 x 50 = 2500 筆
-        params = {"limit": 50, "page": page}
-        try:
-            resp = requests.get(url, headers=headers, params=params)
-            if resp.status_code != 200:
-                break
-            orders = resp.json()
-            if not orders:
-                break
-            all_orders.extend(orders)
-            if len(orders) < 50:
-                break
-            page += 1
-        except Exception as e:
-            print(f"Error fetching orders page {page}: {e}")
-            break
+    def fetch_page(page):
+        params = {"limit": CYBERBIZ_PAGE_SIZE, "page": page}
+        with _CYBERBIZ_SLOTS:
+            if ijson is None:
+                resp = SESSION.get(url, headers=headers, params=params)
+                resp.raise_for_status()
+                return _loads(resp.content)
+            # 邊下載邊解析，不必先把整個 response body 讀進記憶體
+            with SESSION.get(url, headers=headers, params=params, stream=True) as resp:
+                resp.raise_for_status()
+                resp.raw.decode_content = True
+                return list(ijson.items(resp.raw, "item", use_float=True))
+    
+    def in_range(item):
+        date_part = (item.get("created_at") or "")[:10]
+        return (not start_date or start_date <= date_part) and (not end_date or date_part <= end_date)
+    
+    items = []
+    with ThreadPoolExecutor(max_workers=CYBERBIZ_PREFETCH_PAGES) as executor:
+        for window_start in range(1, max_pages + 1, CYBERBIZ_PREFETCH_PAGES):
+            pages = range(window_start, min(window_start + CYBERBIZ_PREFETCH_PAGES, max_pages + 1))
+            futures = [executor.submit(fetch_page, page) for page in pages]
+            for page, future in zip(pages, futures):
+                try:
+                    page_items = future.result()
+                except Exception as e:
+                    print(f"Error fetching {resource} page {page}: {e}")
+                    raise CyberbizFetchError(f"{resource} page {page}: {e}") from e
+                if not page_items:
+                    return items
+                items.extend(filter(in_range, page_items))
+                if len(page_items) < CYBERBIZ_PAGE_SIZE:
+                    return items
+                if start_date and _page_older_than(page_items, start_date):
+                    return items
+    return items
+
+
+@_cached_by_period(is_valid=lambda result: result["order_count"] > 0)
+def get_cyberbiz_data(start_date, end_date):
+    """
+    注意：Cyberbiz orders API 不支援日期篩選，需要分頁抓取後本地篩選
+    訂單或會員分頁抓取失敗時拋出 CyberbizFetchError，避免把截斷的營收 / 訂單數當成事實
+    """
+    # 分頁抓取訂單（最多 50 頁 x 50 = 2500 筆），抓取時就只保留日期範圍內的訂單
+    actual_orders = _fetch_cyberbiz_pages("orders", max_pages=50, start_date=start_date, end_date=end_date)
     
-    # 本地篩選日期範圍，同時按日期分組
-    actual_orders = []
-    orders_by_date = {}  # {date_str: [order1, order2, ...]}
+    # 同一次掃描中按日期分組並累計營收
+    total_revenue = 0
+    daily_totals = defaultdict(lambda: [0, 0])  # {date_str: [revenue, order_count]}
     
-    for o in all_orders:
-        created_at = o.get("created_at", "")
+    for o in actual_orders:
         # Cyberbiz format is "YYYY-MM-DD HH:MM:SS"
-        date_part = created_at.split(' ')[0] if created_at else ""
-        if date_part and start_date <= date_part <= end_date:
-            actual_orders.append(o)
-            # 按日期分組
-            if date_part not in orders_by_date:
-                orders_by_date[date_part] = []
-            orders_by_date[date_part].append(o)
-    
-    total_revenue = sum(float(o.get("prices", {}).get("total_price", 0)) for o in actual_orders)
+        price = float(o.get("prices", {}).get("total_price", 0))
+        total_revenue += price
+        day = daily_totals[o["created_at"][:10]]
+        day[0] += price
+        day[1] += 1
+    
     order_count = len(actual_orders)
     
     # [NEW] 計算客單價 (AOV - Average Order Value)
@@ -1279,14 +1687,11 @@ def get_cyberbiz_data(start_date, end_date):
     
     # [NEW] 計算每日 AOV 明細
     daily_aov = []
-    for date_str in sorted(orders_by_date.keys()):
-        day_orders = orders_by_date[date_str]
-        day_revenue = sum(float(o.get("prices", {}).get("total_price", 0)) for o in day_orders)
-        day_order_count = len(day_orders)
-        day_aov = round(day_revenue / day_order_count, 2) if day_order_count > 0 else 0
+    for date_str in sorted(daily_totals):
+        day_revenue, day_order_count = daily_totals[date_str]
         daily_aov.append({
             "date": date_str,
-            "aov": day_aov,
+            "aov": round(day_revenue / day_order_count, 2),
             "orders": day_order_count,
             "revenue": round(day_revenue, 2)
         })
@@ -1312,78 +1717,40 @@ def get_new_members_count(start_date, end_date):
     從 Cyberbiz API 取得指定日期範圍內的新增會員數
     注意：Cyberbiz customers API 不支援日期篩選，需要抓取全部後本地篩選
     """
-    url = "https://app-store-api.cyberbiz.io/v1/customers"
-    headers = {
-        "Authorization": f"Bearer {CYBERBIZ_TOKEN}",
-        "Accept": "application/json"
-    }
-    
-    all_customers = []
-    page = 1
-    
-    # 抓取所有會員 (假設總數 < 1000)
-    while page <= 20:  # 最多 20 頁 x 50 = 1000 筆
-        params = {"limit": 50, "page": page}
-        try:
-            resp = requests.get(url, headers=headers, params=params)
-            if resp.status_code != 200:
-                break
-            customers = resp.json()
-            if not customers:
-                break
-            all_customers.extend(customers)
-            if len(customers) < 50:
-                break
-            page += 1
-        except Exception as e:
-            print(f"Error fetching customers page {page}: {e}")
-            break
-    
-    # 本地篩選日期範圍
-    new_members = 0
-    for customer in all_customers:
-        created_at = customer.get("created_at", "")
-        date_part = created_at.split(' ')[0] if created_at else ""
-        if date_part and start_date <= date_part <= end_date:
-            new_members += 1
-    
-    return new_members
+    # 抓取會員 (假設總數 < 1000)，最多 20 頁 x 50 = 1000 筆，抓取時就只保留日期範圍內的會員
+    return len(_fetch_cyberbiz_pages("customers", max_pages=20, start_date=start_date, end_date=end_date))
 
 
 def get_product_ranking(orders):
     """
     [NEW] 從訂單中計算商品銷售排行
     """
-    product_sales = {}
+    product_sales = defaultdict(lambda: {
+        "product_name": None,
+        "variant": "",
+        "sku": "",
+        "total_quantity": 0,
+        "total_revenue": 0
+    })
     
     for order in orders:
-        line_items = order.get("line_items", [])
-        for item in line_items:
-            product_name = item.get("title", item.get("name", "Unknown"))
-            variant_title = item.get("variant_title", "")
-            sku = item.get("sku", "")
+        for item in order.get("line_items", []):
+            # 只在沒有 title 時才查 name（原本每筆都會先算預設值）
+            product_name = item["title"] if "title" in item else item.get("name", "Unknown")
             quantity = int(item.get("quantity", 1))
-            price = float(item.get("price", 0))
             
             # Use product name as key (could also use SKU)
-            key = product_name
-            if key not in product_sales:
-                product_sales[key] = {
-                    "product_name": product_name,
-                    "variant": variant_title,
-                    "sku": sku,
-                    "total_quantity": 0,
-                    "total_revenue": 0
-                }
-            product_sales[key]["total_quantity"] += quantity
-            product_sales[key]["total_revenue"] += price * quantity
+            entry = product_sales[product_name]
+            if entry["product_name"] is None:
+                # 第一次出現時記下商品資訊
+                entry["product_name"] = product_name
+                entry["variant"] = item.get("variant_title", "")
+                entry["sku"] = item.get("sku", "")
+            entry["total_quantity"] += quantity
+            entry["total_revenue"] += float(item.get("price", 0)) * quantity
     
     # Sort by total revenue and return top 10
-    ranking = sorted(
-        product_sales.values(), 
-        key=lambda x: x["total_revenue"], 
-        reverse=True
-    )[:10]
+    ranking = heapq.nlargest(10, product_sales.values(), key=itemgetter("total_revenue"))
     
     # Round revenue values
     for item in ranking:
@@ -1404,31 +1771,22 @@ def download_creative_images(creatives, output_dir="creative_images"):
         "Referer": "https://www.facebook.com/"
     }
     
-    downloaded = []
+    # 先列出所有要下載的圖片 (url, 檔名, 下載成功後的紀錄)，再平行下載
+    tasks = []
     for i, creative in enumerate(creatives[:3]):  # Process top 3 ads
         ad_name = creative.get("ad_name", f"creative_{i}")
         safe_name = "".join(c for c in ad_name if c.isalnum() or c in (' ', '-', '_')).rstrip()[:50]
         
-        # Download main image
+        # Main image
         main_image_url = creative.get("image_url")
         if main_image_url:
-            try:
-                resp = requests.get(main_image_url, headers=headers, timeout=30, allow_redirects=True)
-                if resp.status_code == 200 and len(resp.content) > 1000:
-                    filename = f"{output_dir}/{safe_name}_main.jpg"
-                    with open(filename, "wb") as f:
-                        f.write(resp.content)
-                    downloaded.append({
-                        "name": f"{ad_name} (主圖)", 
-                        "file": filename, 
-                        "roas": creative.get("roas", 0),
-                        "type": "main"
-                    })
-                    print(f"  ✓ Downloaded main: {safe_name}")
-            except Exception as e:
-                print(f"  ✗ Error downloading main image: {e}")
+            tasks.append((main_image_url, f"{output_dir}/{safe_name}_main.jpg", {
+                "name": f"{ad_name} (主圖)", 
+                "roas": creative.get("roas", 0),
+                "type": "main"
+            }))
         
-        # Download carousel images
+        # Carousel images
         carousel_images = creative.get("carousel_images", [])
         if carousel_images:
             print(f"  發現輪播素材，共 {len(carousel_images)} 張圖片")
@@ -1436,23 +1794,29 @@ def download_creative_images(creatives, output_dir="creative_images"):
                 img_url = img_data.get("url") if isinstance(img_data, dict) else img_data
                 if not img_url or not img_url.startswith("http"):
                     continue
-                    
-                try:
-                    resp = requests.get(img_url, headers=headers, timeout=30, allow_redirects=True)
-                    if resp.status_code == 200 and len(resp.content) > 1000:
-                        filename = f"{output_dir}/{safe_name}_carousel_{idx+1}.jpg"
-                        with open(filename, "wb") as f:
-                            f.write(resp.content)
-                        downloaded.append({
-                            "name": f"{ad_name} (輪播{idx+1})", 
-                            "file": filename, 
-                            "roas": creative.get("roas", 0),
-                            "type": "carousel",
-                            "description": img_data.get("description", "") if isinstance(img_data, dict) else ""
-                        })
-                        print(f"    ✓ Downloaded carousel {idx+1}")
-                except Exception as e:
-                    print(f"    ✗ Error downloading carousel {idx+1}: {e}")
+                tasks.append((img_url, f"{output_dir}/{safe_name}_carousel_{idx+1}.jpg", {
+                    "name": f"{ad_name} (輪播{idx+1})", 
+                    "roas": creative.get("roas", 0),
+                    "type": "carousel",
+                    "description": img_data.get("description", "") if isinstance(img_data, dict) else ""
+                }))
+    
+    def download_one(task):
+        url, filename, record = task
+        try:
+            resp = SESSION.get(url, headers=headers, timeout=30, allow_redirects=True)
+            if resp.status_code == 200 and len(resp.content) > 1000:
+                with open(filename, "wb") as f:
+                    f.write(resp.content)
+                print(f"  ✓ Downloaded {os.path.basename(filename)}")
+                return {"name": record["name"], "file": filename, **record}
+        except Exception as e:
+            print(f"  ✗ Error downloading {os.path.basename(filename)}: {e}")
+        return None
+    
+    # 每張圖互不相依，同時下載（結果維持原本的順序）
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        downloaded = [item for item in executor.map(download_one, tasks) if item]
     
     print(f"\n總共下載 {len(downloaded)} 張圖片")
     return downloaded
@@ -1482,18 +1846,58 @@ def main():
 
     print(f"Fetching {args.mode} data from {start_date} to {end_date}...")
     
-    # Fetch current period data
-    meta = get_meta_data(start_date, end_date)
-    ga4 = get_ga4_data(start_date, end_date)
-    cyber = get_cyberbiz_data(start_date, end_date)
-    
-    # [NEW] Fetch Meta audience breakdown data
-    print("Fetching Meta audience breakdown data...")
-    meta_audience = get_meta_audience_breakdown(start_date, end_date)
+    # 比較期間：weekly 取前 7 天（WoW），daily 取前一天（DoD）
+    if args.mode == "weekly":
+        prev_end_dt = datetime.strptime(start_date, "%Y-%m-%d") - timedelta(days=1)
+        prev_start_dt = prev_end_dt - timedelta(days=6)
+        prev_start = prev_start_dt.strftime("%Y-%m-%d")
+        prev_end = prev_end_dt.strftime("%Y-%m-%d")
+        print(f"Fetching WoW comparison data from {prev_start} to {prev_end}...")
+        prev_fetchers = {"prev_meta": get_meta_data, "prev_cyber": get_cyberbiz_data}
+    else:
+        # 前天的日期
+        prev_date_dt = datetime.strptime(start_date, "%Y-%m-%d") - timedelta(days=1)
+        prev_date = prev_date_dt.strftime("%Y-%m-%d")
+        prev_start = prev_end = prev_date
+        print(f"Fetching DoD comparison data from {prev_date}...")
+        prev_fetchers = {"prev_meta": get_meta_data, "prev_cyber": get_cyberbiz_data, "prev_ga4": get_ga4_data}
     
-    # [NEW] Fetch Meta ad creatives with copy
-    print("Fetching Meta ad creatives...")
-    ad_creatives = get_meta_ad_creatives(start_date, end_date)
+    # Fetch current period data
+    # Meta（總覽、受眾、素材、效率指標、廣告組）、GA4、Cyberbiz、GSC 互不相依，全部同時抓取
+    # 比較期間的資料也一起送出，總耗時約等於最慢的一項
+    print("Fetching Meta, GA4, Cyberbiz and GSC data concurrently...")
+    fetchers = {
+        "meta": get_all_meta_data,
+        "ga4": get_all_ga4_data,                   # 總覽、渠道、[NEW] 裝置、新/回訪用戶、互動指標
+        "cyber": get_cyberbiz_data,
+        "gsc": get_gsc_data,                       # [NEW] Google Search Console
+    }
+    with ThreadPoolExecutor(max_workers=len(fetchers) + len(prev_fetchers)) as executor:
+        futures = {key: executor.submit(fetch, start_date, end_date) for key, fetch in fetchers.items()}
+        futures.update({key: executor.submit(fetch, prev_start, prev_end) for key, fetch in prev_fetchers.items()})
+        results = {}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except CyberbizFetchError as e:
+                # Cyberbiz 重試後仍失敗：報表照常產出，Cyberbiz 區塊標記錯誤，相關比較 / 指標留空
+                print(f"⚠️ Cyberbiz data incomplete ({key}), marking it as an error in the report: {e}")
+                results[key] = _cyberbiz_error_result(e)
+    
+    meta_results = results["meta"]
+    meta = meta_results["meta"]
+    meta_audience = meta_results["meta_audience"]
+    ad_creatives = meta_results["ad_creatives"]
+    meta_efficiency = meta_results["meta_efficiency"]
+    meta_adsets = meta_results["meta_adsets"]
+    ga4_results = results["ga4"]
+    ga4 = ga4_results["ga4"]
+    ga4_devices = ga4_results["ga4_devices"]
+    ga4_user_types = ga4_results["ga4_user_types"]
+    ga4_engagement = ga4_results["ga4_engagement"]
+    cyber = results["cyber"]
+    cyber_ok = "error" not in cyber
+    gsc_data = results["gsc"]
     
     # [2026-02-13 NEW] 影片素材分析
     video_creatives = [c for c in ad_creatives if c.get("is_video") and c.get("video_id")]
@@ -1526,45 +1930,18 @@ def main():
     print("Extracting ad copies...")
     ad_copies = extract_ad_copies(ad_creatives)
     
-    # [NEW] Fetch Meta efficiency metrics (CPM, Frequency, Reach)
-    print("Fetching Meta efficiency metrics...")
-    meta_efficiency = get_meta_efficiency_metrics(start_date, end_date)
-    
-    # [NEW] Fetch Meta adset level data
-    print("Fetching Meta adset data...")
-    meta_adsets = get_meta_adset_data(start_date, end_date)
-    
-    # [NEW] Fetch GA4 device distribution
-    print("Fetching GA4 device data...")
-    ga4_devices = get_ga4_device_data(start_date, end_date)
-    
-    # [NEW] Fetch GA4 new vs returning users
-    print("Fetching GA4 user type data...")
-    ga4_user_types = get_ga4_user_type(start_date, end_date)
-    
-    # [NEW] Fetch GA4 engagement metrics
-    print("Fetching GA4 engagement metrics...")
-    ga4_engagement = get_ga4_engagement(start_date, end_date)
-    
-    # [NEW] Fetch Google Search Console data
-    print("Fetching GSC data...")
-    gsc_data = get_gsc_data(start_date, end_date)
-    
     # Fetch previous period data for WoW comparison (weekly mode only)
     wow_data = None
     if args.mode == "weekly":
-        prev_end_dt = datetime.strptime(start_date, "%Y-%m-%d") - timedelta(days=1)
-        prev_start_dt = prev_end_dt - timedelta(days=6)
-        prev_start = prev_start_dt.strftime("%Y-%m-%d")
-        prev_end = prev_end_dt.strftime("%Y-%m-%d")
-        print(f"Fetching WoW comparison data from {prev_start} to {prev_end}...")
-        prev_meta = get_meta_data(prev_start, prev_end)
-        prev_cyber = get_cyberbiz_data(prev_start, prev_end)
+        prev_meta = results["prev_meta"]
+        prev_cyber = results["prev_cyber"]
+        # 任一期間的 Cyberbiz 抓取失敗時不計算 Cyberbiz 比較
+        cyber_cmp = cyber_ok and "error" not in prev_cyber
         wow_data = {
             "meta_roas_change": ((meta["total"]["roas"] / prev_meta["total"]["roas"] - 1) * 100) if prev_meta["total"] and prev_meta["total"]["roas"] > 0 else None,
-            "cyber_revenue_change": ((cyber["total_revenue"] / prev_cyber["total_revenue"] - 1) * 100) if prev_cyber["total_revenue"] > 0 else None,
+            "cyber_revenue_change": ((cyber["total_revenue"] / prev_cyber["total_revenue"] - 1) * 100) if cyber_cmp and prev_cyber["total_revenue"] > 0 else None,
             # [NEW] AOV 週比變化
-            "cyber_aov_change": ((cyber["aov"] / prev_cyber["aov"] - 1) * 100) if prev_cyber.get("aov", 0) > 0 else None,
+            "cyber_aov_change": ((cyber["aov"] / prev_cyber["aov"] - 1) * 100) if cyber_cmp and prev_cyber.get("aov", 0) > 0 else None,
             "prev_meta": prev_meta["total"],
             "prev_cyber": prev_cyber
         }
@@ -1572,14 +1949,11 @@ def main():
     # [NEW] Fetch previous day data for DoD comparison (daily mode)
     dod_data = None
     if args.mode == "daily":
-        # 前天的日期
-        prev_date_dt = datetime.strptime(start_date, "%Y-%m-%d") - timedelta(days=1)
-        prev_date = prev_date_dt.strftime("%Y-%m-%d")
-        print(f"Fetching DoD comparison data from {prev_date}...")
-        
-        prev_meta = get_meta_data(prev_date, prev_date)
-        prev_cyber = get_cyberbiz_data(prev_date, prev_date)
-        prev_ga4 = get_ga4_data(prev_date, prev_date)
+        prev_meta = results["prev_meta"]
+        prev_cyber = results["prev_cyber"]
+        prev_ga4 = results["prev_ga4"]
+        # 任一期間的 Cyberbiz 抓取失敗時不計算 Cyberbiz 比較
+        cyber_cmp = cyber_ok and "error" not in prev_cyber
         
         # 計算各項 DoD 變化率
         dod_data = {
@@ -1589,9 +1963,9 @@ def main():
             "prev_ga4": prev_ga4["total"],
             
             # Cyberbiz 變化率
-            "cyber_revenue_change": round(((cyber["total_revenue"] / prev_cyber["total_revenue"] - 1) * 100), 2) if prev_cyber["total_revenue"] > 0 else None,
-            "cyber_order_change": round(((cyber["order_count"] / prev_cyber["order_count"] - 1) * 100), 2) if prev_cyber["order_count"] > 0 else None,
-            "cyber_aov_change": round(((cyber["aov"] / prev_cyber["aov"] - 1) * 100), 2) if prev_cyber.get("aov", 0) > 0 else None,
+            "cyber_revenue_change": round(((cyber["total_revenue"] / prev_cyber["total_revenue"] - 1) * 100), 2) if cyber_cmp and prev_cyber["total_revenue"] > 0 else None,
+            "cyber_order_change": round(((cyber["order_count"] / prev_cyber["order_count"] - 1) * 100), 2) if cyber_cmp and prev_cyber["order_count"] > 0 else None,
+            "cyber_aov_change": round(((cyber["aov"] / prev_cyber["aov"] - 1) * 100), 2) if cyber_cmp and prev_cyber.get("aov", 0) > 0 else None,
             
             # Meta Ads 變化率
             "meta_roas_change": round(((meta["total"]["roas"] / prev_meta["total"]["roas"] - 1) * 100), 2) if prev_meta["total"] and prev_meta["total"]["roas"] > 0 else None,
@@ -1626,17 +2000,16 @@ def main():
             
             # 為 ad_creatives 補充成效數據（從 meta_adsets 取得）
             adset_metrics = {adset.get("adset_name", ""): adset for adset in meta_adsets}
+            match_adset = build_adset_name_matcher(adset_metrics)
             for creative in ad_creatives:
-                ad_name = creative.get("ad_name", "")
                 # 嘗試從 adset 名稱匹配成效數據
-                for adset_name, adset in adset_metrics.items():
-                    if ad_name in adset_name or adset_name in ad_name:
-                        creative["ctr"] = adset.get("ctr", 0)
-                        creative["roas"] = adset.get("roas", 0)
-                        creative["spend"] = adset.get("spend", 0)
-                        creative["purchases"] = adset.get("purchases", 0)
-                        creative["cpm"] = adset.get("cpm", 0)
-                        break
+                adset = match_adset(creative.get("ad_name", ""))
+                if adset is not None:
+                    creative["ctr"] = adset.get("ctr", 0)
+                    creative["roas"] = adset.get("roas", 0)
+                    creative["spend"] = adset.get("spend", 0)
+                    creative["purchases"] = adset.get("purchases", 0)
+                    creative["cpm"] = adset.get("cpm", 0)
             
             # 執行完整 AI 分析（Vision + 文案）
             ad_creatives = run_full_ai_analysis(ad_creatives)
@@ -1650,7 +2023,11 @@ def main():
         print("\n📊 AI Analysis skipped (--skip-ai-analysis). Use trigger_ai_analysis.py to generate sub-agent task.")
     
     spend = meta["total"]["spend"] if meta["total"] else 0
-    mer = cyber["total_revenue"] / spend if spend > 0 else 0
+    # Cyberbiz 抓取失敗時營收未知，MER 留空而不是 0
+    if not cyber_ok:
+        mer = None
+    else:
+        mer = cyber["total_revenue"] / spend if spend > 0 else 0
     
     # [ENHANCED] 優化後的報表結構
     report = {
@@ -1693,7 +2070,7 @@ def main():
         "summary": {
             "total_spend": spend,
             "total_revenue": cyber["total_revenue"],
-            "mer": round(mer, 2),
+            "mer": round(mer, 2) if mer is not None else None,
             "roas": meta["total"]["roas"] if meta["total"] else 0,
             "order_count": cyber["order_count"],
             "aov": cyber["aov"],
@@ -1712,12 +2089,19 @@ def main():
     }
     
     # 輸出檔名帶上 start_date，避免多個平行執行互相覆蓋
+    # report_data 只給上傳腳本讀取，寫成不縮排的精簡 JSON；給人看的是下面的 REPORT_PREVIEW
     output_filename = f"report_data_{start_date}.json"
-    with open(output_filename, "w", encoding="utf-8") as f:
-        json.dump(report, f, indent=2, ensure_ascii=False)
+    if orjson:
+        # 整份 bytes 一次寫出，不需要 Python 層的緩衝
+        with open(output_filename, "wb", buffering=0) as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(output_filename, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+            json.dump(report, f, ensure_ascii=False, separators=(",", ":"))
     print(f"Report data saved to {output_filename}")
 
     # New: Auto-generate text report for preview
+    # 預覽與下方的 Supabase 上傳都直接吃記憶體中的 report dict，不再讀回 / 解析剛寫出的 JSON
     try:
         from scripts.report_formatter import generate_report_text
         report_text = generate_report_text(report)
@@ -1790,8 +2174,9 @@ def generate_alerts(meta, meta_efficiency, ga4, cyber):
         })
     
     # 3. ROAS 過低警示
-    roas = meta.get("total", {}).get("roas", 0) if meta.get("total") else 0
-    if roas > 0 and roas < 1.5:
+    meta_total = meta.get("total")
+    roas = meta_total.get("roas", 0) if meta_total else 0
+    if 0 < roas < 1.5:
         alerts.append({
             "type": "warning",
             "category": "Meta Ads",
@@ -1802,9 +2187,9 @@ def generate_alerts(meta, meta_efficiency, ga4, cyber):
         })
     
     # 4. 轉換率過低警示
-    funnel = ga4.get("total", {}).get("funnel_rates", {})
+    funnel = (ga4.get("total") or {}).get("funnel_rates") or {}
     overall_conv = funnel.get("overall_conversion", 0)
-    if overall_conv > 0 and overall_conv < 0.5:
+    if 0 < overall_conv < 0.5:
         alerts.append({
             "type": "warning",
             "category": "GA4",
@@ -1826,8 +2211,17 @@ def generate_alerts(meta, meta_efficiency, ga4, cyber):
             "threshold": 70
         })
     
-    # 6. 零訂單警示
-    if cyber.get("order_count", 0) == 0:
+    # 6. 零訂單警示（Cyberbiz 抓取失敗時改發資料不完整警示，不誤判為零訂單）
+    if cyber.get("error"):
+        alerts.append({
+            "type": "critical",
+            "category": "Cyberbiz",
+            "message": "🚨 Cyberbiz 資料抓取失敗，訂單 / 營收 / 會員數未列入本報表",
+            "metric": "order_count",
+            "value": None,
+            "threshold": None
+        })
+    elif cyber.get("order_count", 0) == 0:
         alerts.append({
             "type": "critical",
             "category": "Cyberbiz",
@@ -1847,20 +2241,13 @@ def get_top_audience_segment(audience_data):
     if not audience_data or not audience_data.get("age_gender"):
         return None
     
-    # Find segment with highest purchases relative to spend
-    best_segment = None
-    best_roi = 0
-    
-    for segment in audience_data["age_gender"]:
-        spend = segment.get("spend", 0)
-        purchases = segment.get("purchases", 0)
-        if spend > 0:
-            roi = purchases / spend
-            if roi > best_roi:
-                best_roi = roi
-                best_segment = f"{segment['gender']} {segment['age_range']}"
-    
-    return best_segment
+    # Find segment with highest purchases relative to spend（同分取第一個；沒有購買的分群不列入）
+    best = max(
+        (s for s in audience_data["age_gender"] if s.get("spend", 0) > 0 and s.get("purchases", 0) > 0),
+        key=lambda s: s["purchases"] / s["spend"],
+        default=None,
+    )
+    return f"{best['gender']} {best['age_range']}" if best else None
 
 
 if __name__ == "__main__":
@@ -10,6 +10,7 @@ Usage:
 import os
 import sys
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -20,7 +21,7 @@ from dotenv import load_dotenv
 load_dotenv(Path(__file__).parent.parent / '.env.local')
 
 # Import required modules
-from scripts.daily_report import get_cyberbiz_data
+from scripts.daily_report import get_cyberbiz_data, CyberbizFetchError
 
 try:
     from supabase import create_client, Client
@@ -29,6 +30,11 @@ except ImportError:
     sys.exit(1)
 
 
+# Concurrent days in flight (each is one Cyberbiz fetch + one Supabase upsert).
+# Cyberbiz page requests from all days also share daily_report's in-flight cap.
+DEFAULT_WORKERS = 4
+
+
 def get_supabase_client() -> Client:
     """Create and return Supabase client."""
     url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
@@ -41,29 +47,77 @@ def get_supabase_client() -> Client:
     return create_client(url, key)
 
 
-def fetch_and_upload_daily_data(start_date: str, end_date: str, dry_run: bool = False):
+def upload_daily_record(supabase, date_str: str, cyber_data: dict) -> str:
+    """Upsert one day's report record; returns 'updated' or 'inserted'."""
+    report_record = {
+        'mode': 'daily',
+        'start_date': date_str,
+        'end_date': date_str,
+        'generated_at': datetime.now().isoformat(),
+        
+        # Cyberbiz fields (primary data for daily mode)
+        'cyber_order_count': cyber_data.get('order_count', 0),
+        'cyber_revenue': cyber_data.get('total_revenue', 0),
+        'cyber_aov': cyber_data.get('aov', 0),
+        'cyber_new_members': cyber_data.get('new_members', 0),
+        
+        # Set other fields to 0/null for daily mode
+        'meta_spend': 0,
+        'meta_ctr': 0,
+        'meta_clicks': 0,
+        'meta_roas': 0,
+        'meta_purchases': 0,
+        'meta_atc': 0,
+        'meta_conv_value': 0,
+        'meta_cpa': 0,
+        'ga4_active_users': 0,
+        'ga4_sessions': 0,
+        'ga4_atc': 0,
+        'ga4_purchases': 0,
+        'ga4_revenue': 0,
+        'ga4_overall_conversion': 0,
+        'mer': 0,
+    }
+    
+    # Upsert (update if exists, insert if not)
+    existing = supabase.table('reports').select('id').eq('start_date', date_str).eq('mode', 'daily').execute()
+    
+    if existing.data and len(existing.data) > 0:
+        # Update existing
+        report_id = existing.data[0]['id']
+        supabase.table('reports').update(report_record).eq('id', report_id).execute()
+        return 'updated'
+    
+    # Insert new
+    supabase.table('reports').insert(report_record).execute()
+    return 'inserted'
+
+
+def fetch_and_upload_daily_data(start_date: str, end_date: str, dry_run: bool = False,
+                                max_workers: int = DEFAULT_WORKERS):
     """
     Fetch daily Cyberbiz data for date range and upload to Supabase.
     
-    Each day gets its own report record with mode='daily'.
+    Each day gets its own report record with mode='daily'. Days are
+    independent, so they are fetched and uploaded on a thread pool that
+    shares one Supabase client; output is still printed in date order.
     """
     supabase = get_supabase_client() if not dry_run else None
     
     start_dt = datetime.strptime(start_date, "%Y-%m-%d")
     end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+    total_days = (end_dt - start_dt).days + 1
+    dates = [(start_dt + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(total_days)]
     
-    current_dt = start_dt
     success_count = 0
     error_count = 0
     
     print(f"📊 Fetching daily AOV data from {start_date} to {end_date}")
-    print(f"   Total days: {(end_dt - start_dt).days + 1}")
+    print(f"   Total days: {total_days}")
     print()
     
-    while current_dt <= end_dt:
-        date_str = current_dt.strftime("%Y-%m-%d")
-        print(f"  📅 {date_str}: ", end="", flush=True)
-        
+    def process_one_day(date_str):
+        """Fetch and upload a single day; returns (status line, succeeded)."""
         try:
             # Fetch Cyberbiz data for this single day
             cyber_data = get_cyberbiz_data(date_str, date_str)
@@ -71,64 +125,27 @@ def fetch_and_upload_daily_data(start_date: str, end_date: str, dry_run: bool =
             aov = cyber_data.get('aov', 0)
             orders = cyber_data.get('order_count', 0)
             revenue = cyber_data.get('total_revenue', 0)
-            new_members = cyber_data.get('new_members', 0)
-            
-            print(f"AOV=${aov:.0f}, Orders={orders}, Revenue=${revenue:.0f}", end="")
+            line = f"AOV=${aov:.0f}, Orders={orders}, Revenue=${revenue:.0f}"
             
             if dry_run:
-                print(" (dry-run)")
-            else:
-                # Upload to Supabase
-                report_record = {
-                    'mode': 'daily',
-                    'start_date': date_str,
-                    'end_date': date_str,
-                    'generated_at': datetime.now().isoformat(),
-                    
-                    # Cyberbiz fields (primary data for daily mode)
-                    'cyber_order_count': orders,
-                    'cyber_revenue': revenue,
-                    'cyber_aov': aov,
-                    'cyber_new_members': new_members,
-                    
-                    # Set other fields to 0/null for daily mode
-                    'meta_spend': 0,
-                    'meta_ctr': 0,
-                    'meta_clicks': 0,
-                    'meta_roas': 0,
-                    'meta_purchases': 0,
-                    'meta_atc': 0,
-                    'meta_conv_value': 0,
-                    'meta_cpa': 0,
-                    'ga4_active_users': 0,
-                    'ga4_sessions': 0,
-                    'ga4_atc': 0,
-                    'ga4_purchases': 0,
-                    'ga4_revenue': 0,
-                    'ga4_overall_conversion': 0,
-                    'mer': 0,
-                }
-                
-                # Upsert (update if exists, insert if not)
-                existing = supabase.table('reports').select('id').eq('start_date', date_str).eq('mode', 'daily').execute()
-                
-                if existing.data and len(existing.data) > 0:
-                    # Update existing
-                    report_id = existing.data[0]['id']
-                    supabase.table('reports').update(report_record).eq('id', report_id).execute()
-                    print(f" ✓ updated")
-                else:
-                    # Insert new
-                    supabase.table('reports').insert(report_record).execute()
-                    print(f" ✓ inserted")
-                
-                success_count += 1
-                
+                return f"{line} (dry-run)", None
+            
+            action = upload_daily_record(supabase, date_str, cyber_data)
+            return f"{line} ✓ {action}", True
+        except CyberbizFetchError as e:
+            # Partial order/customer lists would be upserted as fact; skip the day
+            return f" ✗ Incomplete Cyberbiz data, not uploaded: {e}", False
         except Exception as e:
-            print(f" ✗ Error: {e}")
-            error_count += 1
-        
-        current_dt += timedelta(days=1)
+            return f" ✗ Error: {e}", False
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total_days))) as executor:
+        # map() yields in submission order, so the log reads chronologically
+        for date_str, (line, ok) in zip(dates, executor.map(process_one_day, dates)):
+            print(f"  📅 {date_str}: {line}")
+            if ok:
+                success_count += 1
+            elif ok is False:
+                error_count += 1
     
     print()
     print(f"{'=' * 50}")
@@ -145,6 +162,7 @@ def main():
     parser.add_argument('--end', help='End date YYYY-MM-DD')
     parser.add_argument('--days', type=int, default=28, help='Number of past days to fetch (default: 28)')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be fetched without uploading')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help=f'Days fetched in parallel (default: {DEFAULT_WORKERS})')
     
     args = parser.parse_args()
     
@@ -160,7 +178,7 @@ def main():
         start_date = start_dt.strftime("%Y-%m-%d")
         end_date = end_dt.strftime("%Y-%m-%d")
     
-    fetch_and_upload_daily_data(start_date, end_date, dry_run=args.dry_run)
+    fetch_and_upload_daily_data(start_date, end_date, dry_run=args.dry_run, max_workers=args.workers)
 
 
 if __name__ == "__main__":
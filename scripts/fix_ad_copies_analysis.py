@@ -5,11 +5,27 @@ import json
 import os
 from supabase import create_client
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Supabase 連線
 url = os.environ.get("SUPABASE_URL")
 key = os.environ.get("SUPABASE_SERVICE_KEY")
 supabase = create_client(url, key)
 
+def load_json(path):
+    """讀取 JSON 檔（有 orjson 時直接從 bytes 解析）"""
+    if orjson:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+# 每次 insert 的最大筆數（PostgREST 接受陣列 payload）
+INSERT_BATCH_SIZE = 500
+
 # 週資料對照
 weeks = [
     {
@@ -50,24 +66,23 @@ def load_ai_analysis(ai_file):
     """載入 AI 分析結果，建立 ad_id -> copy_analysis 對照表"""
     analysis_map = {}
     try:
-        with open(ai_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            for ad in data.get('ads_analysis', []):
-                ad_id = ad.get('ad_id')
-                copy_analysis = ad.get('copy_analysis', {})
-                if ad_id and copy_analysis:
-                    # 轉換為 ad_copies 需要的 analysis 格式
-                    analysis_map[ad_id] = {
-                        'strengths': copy_analysis.get('strengths', []),
-                        'weaknesses': copy_analysis.get('weaknesses', []),
-                        'suggested_improvements': copy_analysis.get('suggested_improvements', []),
-                        'tone': copy_analysis.get('tone', ''),
-                        'emotional_triggers': copy_analysis.get('emotional_triggers', []),
-                        'call_to_action': copy_analysis.get('call_to_action', ''),
-                        'cta_effectiveness': copy_analysis.get('cta_effectiveness', ''),
-                        'cta_score': copy_analysis.get('cta_score'),
-                        'overall_score': copy_analysis.get('overall_score')
-                    }
+        data = load_json(ai_file)
+        for ad in data.get('ads_analysis', []):
+            ad_id = ad.get('ad_id')
+            copy_analysis = ad.get('copy_analysis', {})
+            if ad_id and copy_analysis:
+                # 轉換為 ad_copies 需要的 analysis 格式
+                analysis_map[ad_id] = {
+                    'strengths': copy_analysis.get('strengths', []),
+                    'weaknesses': copy_analysis.get('weaknesses', []),
+                    'suggested_improvements': copy_analysis.get('suggested_improvements', []),
+                    'tone': copy_analysis.get('tone', ''),
+                    'emotional_triggers': copy_analysis.get('emotional_triggers', []),
+                    'call_to_action': copy_analysis.get('call_to_action', ''),
+                    'cta_effectiveness': copy_analysis.get('cta_effectiveness', ''),
+                    'cta_score': copy_analysis.get('cta_score'),
+                    'overall_score': copy_analysis.get('overall_score')
+                }
     except FileNotFoundError:
         print(f"  ⚠️  AI 分析檔案不存在: {ai_file}")
     except Exception as e:
@@ -95,11 +110,10 @@ for week in weeks:
     print(f"  AI 分析數量: {len(ai_analysis_map)} 筆")
     
     try:
-        with open(week['report_file'], 'r', encoding='utf-8') as f:
-            report_data = json.load(f)
+        report_data = load_json(week['report_file'])
         
         ad_copies = report_data.get('ad_copies', [])
-        uploaded = 0
+        records = []
         with_analysis = 0
         
         for copy in ad_copies:
@@ -141,8 +155,14 @@ for week in weeks:
                 'analysis': analysis  # 加入 AI 分析
             }
             
-            supabase.table('ad_copies').insert(data).execute()
-            uploaded += 1
+            records.append(data)
+        
+        # 整週一次（或每 INSERT_BATCH_SIZE 筆一次）批次寫入
+        uploaded = 0
+        for i in range(0, len(records), INSERT_BATCH_SIZE):
+            batch = records[i:i+INSERT_BATCH_SIZE]
+            supabase.table('ad_copies').insert(batch).execute()
+            uploaded += len(batch)
         
         upload_stats[week['week_start']] = {'total': uploaded, 'with_analysis': with_analysis}
         print(f"  ✓ 上傳 {uploaded} 筆，{with_analysis} 筆有 AI 分析")
@@ -11,6 +11,11 @@ import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 try:
     from supabase import create_client, Client
 except ImportError:
@@ -43,20 +48,25 @@ WEEKS = [
 def load_json(filename: str):
     filepath = SCRIPTS_DIR / filename
     if filepath.exists():
+        if orjson:
+            # orjson parses the raw UTF-8 bytes directly
+            return orjson.loads(filepath.read_bytes())
         with open(filepath, 'r', encoding='utf-8') as f:
             return json.load(f)
     return None
 
 
-def get_report_id(start_date: str):
-    """Get report_id for a given start_date."""
+def get_report_ids(start_dates):
+    """Map each start_date to its report_id with a single query."""
+    report_ids = {}
     try:
-        result = supabase.table('reports').select('id').eq('start_date', start_date).execute()
-        if result.data:
-            return result.data[0]['id']
+        result = supabase.table('reports').select('id,start_date').in_('start_date', list(start_dates)).execute()
+        for row in result.data or []:
+            # Keep the first match per date, as the per-date lookup did
+            report_ids.setdefault(row['start_date'], row['id'])
     except Exception as e:
-        print(f"    Error getting report_id: {e}")
-    return None
+        print(f"    Error getting report_ids: {e}")
+    return report_ids
 
 
 def upload_meta_adsets():
@@ -65,6 +75,7 @@ def upload_meta_adsets():
     print("=" * 60)
     
     total = 0
+    report_ids = get_report_ids(week['start'] for week in WEEKS)
     
     for week in WEEKS:
         data = load_json(f"report_data_{week['date']}.json")
@@ -73,7 +84,7 @@ def upload_meta_adsets():
             continue
         
         # Get report_id for this week
-        report_id = get_report_id(week['start'])
+        report_id = report_ids.get(week['start'])
         if not report_id:
             print(f"  ⚠️  {week['date']}: No report found")
             continue
@@ -89,7 +100,9 @@ def upload_meta_adsets():
             print(f"  ⚠️  {week['date']}: No adsets in data")
             continue
         
-        week_count = 0
+        # Keyed by adset_id: a repeated adset in the file keeps its last values,
+        # and a single upsert payload must not touch the same row twice
+        records = {}
         for adset in adsets:
             # Build targeting JSONB from available data
             targeting = adset.get('targeting', {}) or {}
@@ -109,16 +122,15 @@ def upload_meta_adsets():
                 'roas': float(adset.get('roas', 0) or 0),
             }
             
-            try:
-                # Check if exists
-                existing = supabase.table('meta_adsets').select('id').eq('report_id', report_id).eq('adset_id', record['adset_id']).execute()
-                if existing.data:
-                    supabase.table('meta_adsets').update(record).eq('id', existing.data[0]['id']).execute()
-                else:
-                    supabase.table('meta_adsets').insert(record).execute()
-                week_count += 1
-            except Exception as e:
-                print(f"    ⚠️  Failed adset {record['adset_id']}: {e}")
+            records[record['adset_id']] = record
+        
+        # One upsert per week; the (report_id, adset_id) unique index does the merge
+        week_count = 0
+        try:
+            supabase.table('meta_adsets').upsert(list(records.values()), on_conflict='report_id,adset_id').execute()
+            week_count = len(records)
+        except Exception as e:
+            print(f"    ⚠️  Failed to upsert {len(records)} adsets: {e}")
         
         print(f"  ✅ {week['date']}: {week_count} adsets")
         total += week_count
@@ -2,6 +2,10 @@
 
 When Supabase Storage is configured, this module will handle uploading
 creative images for backup. Currently a pass-through stub.
+
+The real implementation should not download carousel images one by one:
+collect every (creative, image) URL first, fetch them concurrently over a
+single shared requests.Session, then upload in a second parallel pass.
 """
 
 def backup_creative_images(creatives: list) -> list:
@@ -0,0 +1,65 @@
+"""
+Helpers shared by the Supabase bulk re-upload scripts
+(clean_and_reupload.py and clear_and_upload.py).
+"""
+
+import io
+import json
+import threading
+from typing import Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to stdlib json
+    orjson = None
+
+
+class ThreadLocalStdout:
+    """stdout proxy that lets a worker thread buffer its own print() output."""
+
+    def __init__(self, target):
+        self._target = target
+        self._local = threading.local()
+
+    def capture(self):
+        self._local.buffer = io.StringIO()
+
+    def release(self) -> str:
+        buffer, self._local.buffer = self._local.buffer, None
+        return buffer.getvalue()
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer or self._target).write(text)
+
+    def flush(self):
+        self._target.flush()
+
+
+# Top-level keys of report JSON that src/lib/useReportData.ts reads from reports.raw_data
+DASHBOARD_RAW_KEYS = ('meta_audience', 'ga4', 'ga4_devices', 'wow', 'gsc')
+
+
+def dashboard_raw_data(data: Dict) -> Dict:
+    """Trimmed raw_data for the reports row: only the sections the dashboard reads."""
+    raw = {key: data[key] for key in DASHBOARD_RAW_KEYS if key in data}
+    # The dashboard only uses meta.total from the meta section
+    meta_total = data.get('meta', {}).get('total')
+    if meta_total is not None:
+        raw['meta'] = {'total': meta_total}
+    return raw
+
+
+def archive_report_json(client, path: str, data: Dict) -> Optional[str]:
+    """Store the full report JSON at path in the private reports bucket; returns the path."""
+    body = orjson.dumps(data) if orjson else json.dumps(data, ensure_ascii=False).encode('utf-8')
+    try:
+        client.storage.from_('reports').upload(
+            path,
+            body,
+            {'content-type': 'application/json', 'upsert': 'true'}
+        )
+        return path
+    except Exception as e:
+        print(f"    ⚠️  Failed to archive raw report JSON: {e}")
+        return None
@@ -0,0 +1,26 @@
+-- List object paths in the ad-images bucket, one page per call
+-- Migration: 2026-10-16
+-- 供腳本透過 supabase.rpc('list_ad_images', {...}) 分頁取得檔案路徑，取代逐資料夾 list()
+-- PostgREST 對 RPC 結果同樣套用 db-max-rows（Supabase 預設 1000），因此由呼叫端以 p_limit / p_offset 分頁
+
+DROP FUNCTION IF EXISTS list_ad_images();
+
+CREATE OR REPLACE FUNCTION list_ad_images(p_limit INTEGER DEFAULT 1000, p_offset INTEGER DEFAULT 0)
+RETURNS SETOF TEXT
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = storage, public
+AS $$
+  SELECT name FROM storage.objects
+  WHERE bucket_id = 'ad-images'
+  ORDER BY name
+  LIMIT p_limit OFFSET p_offset;
+$$;
+
+-- 只允許 service_role 執行
+REVOKE ALL ON FUNCTION list_ad_images(INTEGER, INTEGER) FROM PUBLIC;
+REVOKE ALL ON FUNCTION list_ad_images(INTEGER, INTEGER) FROM anon, authenticated;
+GRANT EXECUTE ON FUNCTION list_ad_images(INTEGER, INTEGER) TO service_role;
+
+COMMENT ON FUNCTION list_ad_images(INTEGER, INTEGER) IS '分頁列出 ad-images bucket 內的檔案路徑（依 name 排序），僅供 service_role 使用';
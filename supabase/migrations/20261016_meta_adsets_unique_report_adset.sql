@@ -0,0 +1,14 @@
+-- meta_adsets: one row per (report_id, adset_id)
+-- Migration: 2026-10-16
+-- 讓 fix_adsets.py 可以用 upsert(on_conflict='report_id,adset_id') 一次寫入整週，不必逐筆 SELECT 再 UPDATE/INSERT
+
+-- 1. 清除既有的重複資料（保留最新一筆）
+DELETE FROM meta_adsets a
+USING meta_adsets b
+WHERE a.report_id = b.report_id
+  AND a.adset_id = b.adset_id
+  AND (a.created_at, a.id) < (b.created_at, b.id);
+
+-- 2. 建立唯一索引（供 upsert 的 ON CONFLICT 使用）
+CREATE UNIQUE INDEX IF NOT EXISTS meta_adsets_report_id_adset_id_key
+  ON meta_adsets(report_id, adset_id);
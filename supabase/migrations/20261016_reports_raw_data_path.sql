@@ -0,0 +1,7 @@
+-- Move raw report JSON out of the reports row
+-- Migration: 2026-10-16
+-- 完整報表 JSON 改存於 Storage 的 reports bucket，資料表只保留路徑
+
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS raw_data_path TEXT;
+
+COMMENT ON COLUMN reports.raw_data_path IS '原始報表 JSON 在 Storage reports bucket 中的路徑（例如 2026-01-15.json）';
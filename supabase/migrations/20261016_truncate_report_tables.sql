@@ -0,0 +1,33 @@
+-- Truncate all report tables in one statement
+-- Migration: 2026-10-16
+-- 供清除腳本透過 supabase.rpc('truncate_report_tables') 呼叫，取代逐表 DELETE
+
+CREATE OR REPLACE FUNCTION truncate_report_tables()
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  TRUNCATE TABLE
+    insight_tracking,
+    weekly_insights,
+    ad_copies,
+    ad_creatives,
+    meta_adsets,
+    product_rankings,
+    ga4_channels,
+    meta_audience_gender,
+    meta_audience_age,
+    meta_campaigns,
+    reports
+  RESTART IDENTITY CASCADE;
+END;
+$$;
+
+-- 只允許 service_role 執行，避免前端 anon key 清空資料
+REVOKE ALL ON FUNCTION truncate_report_tables() FROM PUBLIC;
+REVOKE ALL ON FUNCTION truncate_report_tables() FROM anon, authenticated;
+GRANT EXECUTE ON FUNCTION truncate_report_tables() TO service_role;
+
+COMMENT ON FUNCTION truncate_report_tables() IS '清空所有報表資料表（TRUNCATE ... CASCADE），僅供 service_role 使用';